@@ -0,0 +1,46 @@
+"""
+Compares loading a cached AST from the binary format against re-parsing
+the source and against decoding the JSON AST.
+
+Usage: python benchmarks/ast_format_benchmark.py [repeat]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from binary_ast import dumps, loads  # noqa: E402
+from lexer import Lexer  # noqa: E402
+from lexer_benchmark import SOURCE  # noqa: E402
+from node import NodeEncoder  # noqa: E402
+from token_parser import Parser  # noqa: E402
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = SOURCE * repeat
+
+    start = time.perf_counter()
+    ast = Parser(Lexer(source).get_tokens()).parse()
+    parse_time = time.perf_counter() - start
+
+    encoded = json.dumps(ast, cls=NodeEncoder)
+    start = time.perf_counter()
+    json.loads(encoded)
+    json_time = time.perf_counter() - start
+
+    data = dumps(ast)
+    start = time.perf_counter()
+    loads(data)
+    load_time = time.perf_counter() - start
+
+    print(f"{len(source):,} source bytes, {len(encoded):,} JSON bytes, {len(data):,} binary bytes")
+    print(f"lex + parse:   {parse_time:.3f}s")
+    print(f"json.loads:    {json_time:.3f}s (dicts only)")
+    print(f"binary loads:  {load_time:.3f}s ({parse_time / load_time:.1f}x faster than parsing)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Compares running a program with the slot-resolved, closure-compiled
+Evaluator, the bytecode VM and the Python backend against a naive tree walker that
+dispatches with isinstance chains and keeps variables in a dict keyed by
+name.
+
+Usage: python benchmarks/evaluator_benchmark.py [repeat] [runs]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import bytecode  # noqa: E402
+import python_backend  # noqa: E402
+from evaluator import BINARY_OPERATORS, COMPOUND_ASSIGNMENT_OPERATORS, Evaluator  # noqa: E402
+from lexer import Lexer  # noqa: E402
+from node import (  # noqa: E402
+    AssignmentExpression,
+    BinaryExpression,
+    BlockStatement,
+    ExpressionStatement,
+    Identifier,
+    IfStatement,
+    Literal,
+    LogicalExpression,
+    NullLiteral,
+    Program,
+    StringLiteral,
+    VariableStatement,
+    string_value,
+)
+from token_parser import Parser  # noqa: E402
+
+SOURCE = """
+let pokemon, level = 20, evo_cond = "solar_stone", eevee = "eevee", count = 0
+if (level > 16 is true) then
+    pokemon = "ivysaur"
+else
+    pokemon = "bulbasaur"
+
+if eevee != nil and evo_cond not nil then
+    if evo_cond == "solar_stone" then
+        eevee = "leafeon"
+    if evo_cond == "friendship_with_exchange" then eevee = "sylveon"
+    if evo_cond == "friendship_at_night" then eevee = "umbreon" else eevee = "espeon"
+else eevee = "missingno"
+
+count += level * 2 - 1
+level = (level + count) % 100
+"""
+
+
+class NaiveEvaluator:
+    def __init__(self):
+        self.variables = {}
+
+    def evaluate(self, node):
+        if isinstance(node, (Program, BlockStatement)):
+            for statement in node.statements:
+                self.evaluate(statement)
+        elif isinstance(node, VariableStatement):
+            for declaration in node.declarations:
+                if declaration.initializer:
+                    self.variables[declaration.identifier.name] = self.evaluate(declaration.initializer)
+                else:
+                    self.variables.setdefault(declaration.identifier.name, None)
+        elif isinstance(node, IfStatement):
+            if self.evaluate(node.condition):
+                self.evaluate(node.consequent)
+            elif node.alternate:
+                self.evaluate(node.alternate)
+        elif isinstance(node, ExpressionStatement):
+            return self.evaluate(node.expression)
+        elif isinstance(node, AssignmentExpression):
+            value = self.evaluate(node.right)
+            if node.operator != "=":
+                operator = BINARY_OPERATORS[COMPOUND_ASSIGNMENT_OPERATORS[node.operator]]
+                value = operator(self.variables.get(node.left.name), value)
+            self.variables[node.left.name] = value
+            return value
+        elif isinstance(node, LogicalExpression):
+            left = self.evaluate(node.left)
+            if node.operator == "and":
+                return left and self.evaluate(node.right)
+            return left or self.evaluate(node.right)
+        elif isinstance(node, BinaryExpression):
+            return BINARY_OPERATORS[node.operator](self.evaluate(node.left), self.evaluate(node.right))
+        elif isinstance(node, Identifier):
+            return self.variables.get(node.name)
+        elif isinstance(node, StringLiteral):
+            return string_value(node.value)
+        elif isinstance(node, NullLiteral):
+            return None
+        elif isinstance(node, Literal):
+            return node.value
+        else:
+            raise TypeError(f"Cannot evaluate {type(node).__name__}")
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    program = Parser(Lexer(SOURCE * repeat).get_tokens()).parse()
+
+    naive = NaiveEvaluator()
+    start = time.perf_counter()
+    for _ in range(runs):
+        naive.evaluate(program)
+    naive_time = time.perf_counter() - start
+
+    evaluator = Evaluator()
+    start = time.perf_counter()
+    run = evaluator.compile(program)
+    compile_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(runs):
+        run()
+    elapsed = time.perf_counter() - start
+
+    sequential = Evaluator(decision_tables=False)
+    run = sequential.compile(program)
+    start = time.perf_counter()
+    for _ in range(runs):
+        run()
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    code = bytecode.compile_program(program)
+    bytecode_compile_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(runs):
+        variables = bytecode.run(code, naive.variables)
+    vm_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    function = python_backend.compile_to_python(program)
+    python_compile_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(runs):
+        python_variables = function(naive.variables)
+    python_time = time.perf_counter() - start
+
+    if evaluator.variables() != naive.variables or sequential.variables() != naive.variables:
+        raise SystemExit("The evaluators disagree")
+    if variables != naive.variables or python_variables != naive.variables:
+        raise SystemExit("The evaluators disagree")
+
+    print(f"{repeat} program copies, {runs} runs")
+    print(f"naive walker:      {naive_time:.3f}s")
+    print(f"slot evaluator:    {elapsed:.3f}s (+{compile_time:.3f}s to compile), {naive_time / elapsed:.1f}x")
+    print(f"  without tables:  {sequential_time:.3f}s, {naive_time / sequential_time:.1f}x")
+    print(f"bytecode VM:       {vm_time:.3f}s (+{bytecode_compile_time:.3f}s to compile), {naive_time / vm_time:.1f}x")
+    print(f"python backend:    {python_time:.3f}s (+{python_compile_time:.3f}s to compile), {naive_time / python_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
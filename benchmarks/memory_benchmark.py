@@ -0,0 +1,91 @@
+"""
+Measures the memory held by lexer and parser output: a list of `Token`s
+against the struct-of-arrays `TokenBuffer`, and AST nodes with `__slots__`
+against the same nodes carrying a per-instance `__dict__` and the array-backed
+`FlatAST`.
+
+Usage: python benchmarks/memory_benchmark.py [repeat]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from lexer import Lexer  # noqa: E402
+from lexer_benchmark import SOURCE  # noqa: E402
+from flat_ast import FlatAST  # noqa: E402
+from node import Node  # noqa: E402
+from token_parser import Parser  # noqa: E402
+
+
+class DictNode:
+    """A node storing its fields in a __dict__, as nodes did before slots."""
+
+
+def copy_tree(value, make_node):
+    if isinstance(value, list):
+        return [copy_tree(item, make_node) for item in value]
+    if isinstance(value, Node):
+        return make_node(value, {field: copy_tree(getattr(value, field), make_node) for field in value.__slots__})
+    return value
+
+
+def make_slots_node(node, fields):
+    copy = object.__new__(type(node))
+    for field, value in fields.items():
+        setattr(copy, field, value)
+    return copy
+
+
+def make_dict_node(node, fields):
+    copy = DictNode()
+    copy.__dict__.update(fields)
+    return copy
+
+
+def count_nodes(value):
+    if isinstance(value, list):
+        return sum(count_nodes(item) for item in value)
+    if isinstance(value, Node):
+        return 1 + sum(count_nodes(getattr(value, field)) for field in value.__slots__)
+    return 0
+
+
+def allocated(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = SOURCE * repeat
+
+    tokens, list_size = allocated(lambda: Lexer(source).tokens)
+    buffer, buffer_size = allocated(lambda: Lexer(source, buffered=True).tokens)
+
+    print(f"{len(tokens)} tokens")
+    print(f"token list:   {list_size / len(tokens):>8.1f} bytes/token")
+    print(f"token buffer: {buffer_size / len(buffer):>8.1f} bytes/token")
+    print(f"reduction:    {list_size / buffer_size:>8.1f}x")
+
+    ast = Parser(tokens).parse()
+    nodes = count_nodes(ast)
+    _, dict_size = allocated(lambda: copy_tree(ast, make_dict_node))
+    _, slots_size = allocated(lambda: copy_tree(ast, make_slots_node))
+
+    print(f"{nodes} AST nodes")
+    print(f"__dict__ nodes: {dict_size / nodes:>8.1f} bytes/node")
+    print(f"__slots__ nodes:{slots_size / nodes:>8.1f} bytes/node")
+    print(f"reduction:      {dict_size / slots_size:>8.1f}x")
+
+    _, flat_size = allocated(lambda: FlatAST.from_tree(ast))
+    print(f"FlatAST nodes:  {flat_size / nodes:>8.1f} bytes/node")
+
+
+if __name__ == "__main__":
+    main()
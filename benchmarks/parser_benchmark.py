@@ -0,0 +1,30 @@
+"""
+Measures parsing throughput (tokens/sec) on pre-lexed tokens.
+
+Usage: python benchmarks/parser_benchmark.py [repeat]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from lexer import Lexer  # noqa: E402
+from lexer_benchmark import SOURCE  # noqa: E402
+from token_parser import Parser  # noqa: E402
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tokens = Lexer(SOURCE * repeat).get_tokens()
+
+    start = time.perf_counter()
+    Parser(tokens).parse()
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(tokens)} tokens")
+    print(f"parser: {len(tokens) / elapsed:>12,.0f} tokens/sec ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compares running one rule program over many records a record at a time,
+with the bytecode VM and the Python backend, against evaluating it column
+by column with VectorizedEvaluator. Skipped when numpy is not installed.
+
+Usage: python benchmarks/vectorized_benchmark.py [records]
+"""
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import bytecode  # noqa: E402
+from lexer import Lexer  # noqa: E402
+from python_backend import compile_to_python  # noqa: E402
+from token_parser import Parser  # noqa: E402
+from vectorized import VectorizedEvaluator  # noqa: E402
+
+# The source of main.py
+SOURCE = """
+let pokemon
+let level
+let evo_cond
+
+if (level > 16 is true) then
+    pokemon = "ivysaur"
+else
+    pokemon = "bulbasaur"
+
+if eevee != nil and evo_cond not nil then
+    if evo_cond == "solar_stone" then
+        eevee = "leafeon"
+    if evo_cond == "friendship_with_exchange" then eevee = "sylveon"
+    if evo_cond == "friendship_at_night" then eevee = "umbreon" else eevee = "espeon"
+else eevee = "missingno"
+"""
+
+EVOLUTION_CONDITIONS = ["solar_stone", "friendship_with_exchange", "friendship_at_night", "moon_stone"]
+
+
+def rate(records: int, elapsed: float) -> str:
+    return f"{elapsed:.3f}s, {records / elapsed / 1e6:.2f}M records/s"
+
+
+def main():
+    if np is None:
+        print("numpy is not installed, skipping the vectorized benchmark")
+        return
+
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    program = Parser(Lexer(SOURCE).get_tokens()).parse()
+
+    generator = np.random.default_rng(0)
+    columns = {
+        "level": generator.integers(1, 100, records),
+        "evo_cond": np.array(EVOLUTION_CONDITIONS)[generator.integers(0, len(EVOLUTION_CONDITIONS), records)],
+        "eevee": np.full(records, "eevee"),
+    }
+    # The per-record loops get a tenth of the records
+    sample = records // 10
+    rows = [
+        {"level": level, "evo_cond": evo_cond, "eevee": eevee}
+        for level, evo_cond, eevee in zip(
+            columns["level"][:sample].tolist(), columns["evo_cond"][:sample].tolist(), columns["eevee"][:sample].tolist()
+        )
+    ]
+
+    code = bytecode.compile_program(program)
+    start = time.perf_counter()
+    vm_results = [bytecode.run(code, row) for row in rows]
+    vm_time = time.perf_counter() - start
+
+    function = compile_to_python(program)
+    start = time.perf_counter()
+    python_results = [function(row) for row in rows]
+    python_time = time.perf_counter() - start
+
+    evaluator = VectorizedEvaluator(program)
+    start = time.perf_counter()
+    result = evaluator.evaluate(columns)
+    vectorized_time = time.perf_counter() - start
+
+    for name in result:
+        column = result[name][:sample].tolist()
+        if column != [row[name] for row in vm_results] or column != [row[name] for row in python_results]:
+            raise SystemExit("The evaluators disagree")
+
+    print(f"{records} records")
+    print(f"bytecode VM per record:    {rate(sample, vm_time)}")
+    print(f"python backend per record: {rate(sample, python_time)}")
+    print(f"vectorized:                {rate(records, vectorized_time)}")
+
+
+if __name__ == "__main__":
+    main()
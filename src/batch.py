@@ -0,0 +1,81 @@
+"""
+Parsing many files at once across a pool of worker processes.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional
+
+import binary_ast
+from lexer import Lexer
+from node import Program
+from token_parser import Parser
+
+# Parser errors read "[line:column] message"
+ERROR_POSITION = re.compile(r"\[(\d+):(\d+)\] (.*)", re.DOTALL)
+
+
+class ParseError(NamedTuple):
+    type: str
+    message: str
+    line: Optional[int] = None
+    column: Optional[int] = None
+
+
+class ParseResult(NamedTuple):
+    """
+    Outcome of parsing one file: the AST in the binary AST format, which
+    is cheap to send between processes, or the error that stopped it.
+    """
+
+    path: str
+    data: Optional[bytes] = None
+    error: Optional[ParseError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def load(self) -> Program:
+        if self.error is not None:
+            raise ValueError(f"{self.path} failed to parse: {self.error.message}")
+
+        return binary_ast.loads(self.data)
+
+
+def parse_path(path: str) -> ParseResult:
+    try:
+        with open(path, encoding="utf-8") as file:
+            source = file.read()
+        ast = Parser(Lexer(source).get_tokens()).parse()
+    except SyntaxError as error:
+        match = ERROR_POSITION.fullmatch(str(error))
+        if match is None:
+            return ParseResult(path, error=ParseError(type(error).__name__, str(error)))
+        line, column, message = match.groups()
+        return ParseResult(path, error=ParseError(type(error).__name__, message, int(line), int(column)))
+    except Exception as error:
+        return ParseResult(path, error=ParseError(type(error).__name__, str(error)))
+
+    return ParseResult(path, binary_ast.dumps(ast))
+
+
+def parse_many(paths: Iterable[str], workers: Optional[int] = None, chunksize: int = 16) -> List[ParseResult]:
+    """
+    Parses every file in `paths` on `workers` processes (all the CPUs by
+    default) and returns one result per path, in order. A file that cannot
+    be read or parsed gets an error result; the others are unaffected.
+
+    Files are handed out `chunksize` at a time to amortize the round trips
+    to the workers. With a single worker, files are parsed in this process.
+    """
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+
+    if workers <= 1:
+        return [parse_path(path) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_path, paths, chunksize=chunksize))
@@ -0,0 +1,220 @@
+"""
+Compact binary serialization of ASTs.
+
+Layout (version 1), all integers being unsigned LEB128 varints:
+
+    magic       b"EVEAST"
+    version     varint
+    strings     varint count, then per string: varint byte length, UTF-8 bytes
+    nodes       node records in post-order, children before their parent
+
+A node record starts with its kind tag (its index in `NODE_CLASSES`, or
+NONE_TAG for a missing optional child), followed by:
+
+    list nodes      varint item count (the items are the preceding records)
+    operator nodes  operator id byte
+    identifiers,
+    strings         varint index into the string table
+    integers        zigzag varint
+    floats          8 bytes, little-endian IEEE 754 double
+    booleans        one byte
+
+Post-order lets the reader rebuild the tree with a single loop over the
+records and a stack of finished nodes.
+"""
+import struct
+from typing import BinaryIO, Dict, List
+
+from flat_ast import CHILDREN, LAYOUTS, LIST, NODE_CLASSES, NODE_KINDS, OPERATOR, OPERATOR_IDS, OPERATORS
+from node import (
+    BoolLiteral,
+    FloatLiteral,
+    Identifier,
+    IntegerLiteral,
+    Node,
+    StringLiteral,
+    node_fields,
+)
+
+MAGIC = b"EVEAST"
+VERSION = 1
+NONE_TAG = 0xFF
+
+DOUBLE = struct.Struct("<d")
+
+STRING_CLASSES = (Identifier, StringLiteral)
+LAYOUT_BY_KIND = tuple(LAYOUTS.get(node_class, CHILDREN) for node_class in NODE_CLASSES)
+ARITY_BY_KIND = tuple(len(node_fields(node_class)) for node_class in NODE_CLASSES)
+
+
+def write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, pos: int):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def dumps(ast: Node) -> bytes:
+    strings: Dict[str, int] = {}
+    nodes = bytearray()
+    # Iterative post-order walk: (node, True) once its children are written
+    stack = [(ast, False)]
+
+    while stack:
+        node, expanded = stack.pop()
+        if node is None:
+            nodes.append(NONE_TAG)
+            continue
+
+        node_class = node.node_class
+        kind = NODE_KINDS[node_class]
+        layout = LAYOUT_BY_KIND[kind]
+        fields = node_fields(node_class)
+
+        if layout == LIST:
+            children = getattr(node, fields[0])
+        elif layout == OPERATOR:
+            children = [getattr(node, field) for field in fields[1:]]
+        elif layout == CHILDREN:
+            children = [getattr(node, field) for field in fields]
+        else:
+            children = ()
+
+        if children and not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+
+        nodes.append(kind)
+        if layout == LIST:
+            write_varint(nodes, len(children))
+        elif layout == OPERATOR:
+            nodes.append(OPERATOR_IDS[node.operator])
+        elif node_class in STRING_CLASSES:
+            value = getattr(node, fields[0])
+            index = strings.get(value)
+            if index is None:
+                index = strings[value] = len(strings)
+            write_varint(nodes, index)
+        elif node_class is IntegerLiteral:
+            write_varint(nodes, node.value * 2 if node.value >= 0 else -node.value * 2 - 1)
+        elif node_class is FloatLiteral:
+            nodes += DOUBLE.pack(node.value)
+        elif node_class is BoolLiteral:
+            nodes.append(1 if node.value else 0)
+
+    out = bytearray(MAGIC)
+    write_varint(out, VERSION)
+    write_varint(out, len(strings))
+    for string in strings:
+        encoded = string.encode()
+        write_varint(out, len(encoded))
+        out += encoded
+    out += nodes
+
+    return bytes(out)
+
+
+def loads(data: bytes) -> Node:
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a binary eevee AST")
+
+    try:
+        version, pos = read_varint(data, len(MAGIC))
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary AST version {version}, expected {VERSION}")
+
+        count, pos = read_varint(data, pos)
+        strings: List[str] = []
+        for _ in range(count):
+            length, pos = read_varint(data, pos)
+            if pos + length > len(data):
+                raise ValueError("Truncated or corrupt binary AST")
+            strings.append(data[pos:pos + length].decode())
+            pos += length
+
+        stack: List[Node] = []
+        end = len(data)
+
+        while pos < end:
+            kind = data[pos]
+            pos += 1
+
+            if kind == NONE_TAG:
+                stack.append(None)
+                continue
+
+            node_class = NODE_CLASSES[kind]
+            layout = LAYOUT_BY_KIND[kind]
+
+            if layout == LIST:
+                count = data[pos]
+                pos += 1
+                if count > 0x7F:
+                    count, pos = read_varint(data, pos - 1)
+                if count > len(stack):
+                    raise ValueError("Truncated or corrupt binary AST")
+                if count:
+                    items = stack[-count:]
+                    del stack[-count:]
+                else:
+                    items = []
+                stack.append(node_class(items))
+            elif layout == OPERATOR:
+                operator = OPERATORS[data[pos]]
+                pos += 1
+                right = stack.pop()
+                left = stack.pop()
+                stack.append(node_class(operator, left, right))
+            elif layout == CHILDREN:
+                arity = ARITY_BY_KIND[kind]
+                if arity > len(stack):
+                    raise ValueError("Truncated or corrupt binary AST")
+                if arity:
+                    children = stack[-arity:]
+                    del stack[-arity:]
+                    stack.append(node_class(*children))
+                else:
+                    stack.append(node_class())
+            elif node_class is IntegerLiteral:
+                value, pos = read_varint(data, pos)
+                stack.append(node_class(value >> 1 if not value & 1 else -((value + 1) >> 1)))
+            elif node_class is FloatLiteral:
+                stack.append(node_class(DOUBLE.unpack_from(data, pos)[0]))
+                pos += DOUBLE.size
+            elif node_class is BoolLiteral:
+                stack.append(node_class(data[pos] == 1))
+                pos += 1
+            else:
+                index = data[pos]
+                pos += 1
+                if index > 0x7F:
+                    index, pos = read_varint(data, pos - 1)
+                stack.append(node_class(strings[index]))
+    except (IndexError, struct.error):
+        raise ValueError("Truncated or corrupt binary AST")
+
+    if len(stack) != 1:
+        raise ValueError("Truncated or corrupt binary AST")
+
+    return stack[0]
+
+
+def dump(ast: Node, file: BinaryIO):
+    file.write(dumps(ast))
+
+
+def load(file: BinaryIO) -> Node:
+    return loads(file.read())
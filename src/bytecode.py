@@ -0,0 +1,314 @@
+"""
+Compilation of programs to bytecode for a stack machine.
+
+An instruction is two ints in `Code.instructions`, an opcode and its
+argument (0 when unused): a slot, constant, operator or jump target, the
+latter being an index into `instructions`. The semantics are those of
+`evaluator`.
+"""
+from array import array
+from typing import Any, Callable, Dict, List, Optional
+
+from evaluator import BINARY_OPERATORS, COMPOUND_ASSIGNMENT_OPERATORS
+from node import (
+    AssignmentExpression,
+    BinaryExpression,
+    BlockStatement,
+    BoolLiteral,
+    ExpressionStatement,
+    FloatLiteral,
+    GroupedExpression,
+    Identifier,
+    IfStatement,
+    IntegerLiteral,
+    LogicalExpression,
+    Node,
+    NullLiteral,
+    PrimaryExpression,
+    Program,
+    StringLiteral,
+    VariableStatement,
+    string_value,
+)
+
+# Opcodes
+LOAD_SLOT = 0             # Push values[arg]
+LOAD_CONST = 1            # Push constants[arg]
+STORE_SLOT = 2            # Pop into values[arg]
+BINARY_OP = 3             # Pop right, replace left with OPERATOR_FUNCTIONS[arg](left, right)
+JUMP_IF_FALSE = 4         # Pop, and jump to arg if falsy
+JUMP = 5                  # Jump to arg
+JUMP_IF_FALSE_OR_POP = 6  # Jump to arg keeping the top if falsy, else pop it (`and`)
+JUMP_IF_TRUE_OR_POP = 7   # Jump to arg keeping the top if truthy, else pop it (`or`)
+DUP_TOP = 8               # Push the top again
+POP_TOP = 9               # Pop
+
+OPCODE_NAMES = (
+    "LOAD_SLOT", "LOAD_CONST", "STORE_SLOT", "BINARY_OP", "JUMP_IF_FALSE",
+    "JUMP", "JUMP_IF_FALSE_OR_POP", "JUMP_IF_TRUE_OR_POP", "DUP_TOP", "POP_TOP",
+)
+
+# Operators of BINARY_OP, by argument
+OPERATOR_NAMES = tuple(BINARY_OPERATORS)
+OPERATOR_FUNCTIONS = tuple(BINARY_OPERATORS.values())
+OPERATOR_INDICES = {name: index for index, name in enumerate(OPERATOR_NAMES)}
+
+
+class Code:
+    """A compiled program: its instructions, constants and variable slots."""
+
+    def __init__(self, instructions: array, constants: List[Any], names: List[str]):
+        self.instructions = instructions
+        self.constants = constants
+        # Variable name of each slot
+        self.names = names
+        self.slots = {name: slot for slot, name in enumerate(names)}
+
+    def disassemble(self) -> List[str]:
+        lines = []
+        instructions = self.instructions
+
+        for pc in range(0, len(instructions), 2):
+            opcode, arg = instructions[pc], instructions[pc + 1]
+            if opcode in (LOAD_SLOT, STORE_SLOT):
+                operand = self.names[arg]
+            elif opcode == LOAD_CONST:
+                operand = repr(self.constants[arg])
+            elif opcode == BINARY_OP:
+                operand = OPERATOR_NAMES[arg]
+            elif opcode in (JUMP_IF_FALSE, JUMP, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP):
+                operand = str(arg)
+            else:
+                operand = ""
+            lines.append(f"{pc:>4} {OPCODE_NAMES[opcode]} {operand}".rstrip())
+
+        return lines
+
+
+class Compiler:
+    """
+    Compiles a Program to Code, dispatching on each node's `node_class`.
+    Variable names are resolved to slots as they are met.
+    """
+
+    def __init__(self):
+        self.instructions = array("i")
+        self.constants: List[Any] = []
+        self.constant_ids: Dict[Any, int] = {}
+        self.names: List[str] = []
+        self.slots: Dict[str, int] = {}
+        self.compilers: Dict[type, Callable[[Node], None]] = {
+            Program: self.compile_block,
+            BlockStatement: self.compile_block,
+            VariableStatement: self.compile_variable_statement,
+            IfStatement: self.compile_if_statement,
+            ExpressionStatement: self.compile_expression_statement,
+            AssignmentExpression: self.compile_assignment_expression,
+            BinaryExpression: self.compile_binary_expression,
+            LogicalExpression: self.compile_logical_expression,
+            PrimaryExpression: self.compile_primary_expression,
+            GroupedExpression: self.compile_grouped_expression,
+            IntegerLiteral: self.compile_literal,
+            FloatLiteral: self.compile_literal,
+            StringLiteral: self.compile_string_literal,
+            BoolLiteral: self.compile_literal,
+            NullLiteral: self.compile_null_literal,
+            Identifier: self.compile_identifier,
+        }
+
+    def compile_program(self, program: Program) -> Code:
+        self.compile(program)
+        return Code(self.instructions, self.constants, self.names)
+
+    def compile(self, node: Node):
+        compiler = self.compilers.get(node.node_class)
+        if compiler is None:
+            raise TypeError(f"Cannot compile {node.node_class.__name__}")
+
+        compiler(node)
+
+    def emit(self, opcode: int, arg: int = 0) -> int:
+        """Appends an instruction and returns its index."""
+        self.instructions.append(opcode)
+        self.instructions.append(arg)
+        return len(self.instructions) - 2
+
+    def patch(self, instruction: int):
+        """Points the jump at `instruction` to the next instruction."""
+        self.instructions[instruction + 1] = len(self.instructions)
+
+    def slot(self, name: str) -> int:
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+
+        return slot
+
+    def constant(self, value: Any) -> int:
+        # Keyed by type as well, since 1, 1.0 and True are equal dict keys
+        key = (type(value), value)
+        constant_id = self.constant_ids.get(key)
+        if constant_id is None:
+            constant_id = self.constant_ids[key] = len(self.constants)
+            self.constants.append(value)
+
+        return constant_id
+
+    def compile_block(self, node: Node):
+        for statement in node.statements:
+            self.compile(statement)
+
+    def compile_variable_statement(self, node: VariableStatement):
+        for declaration in node.declarations:
+            slot = self.slot(declaration.identifier.name)
+            # Without an initializer, the variable keeps its value
+            if declaration.initializer:
+                self.compile(declaration.initializer)
+                self.emit(STORE_SLOT, slot)
+
+    def compile_if_statement(self, node: IfStatement):
+        self.compile(node.condition)
+        jump_to_alternate = self.emit(JUMP_IF_FALSE)
+        self.compile(node.consequent)
+
+        if node.alternate is None:
+            self.patch(jump_to_alternate)
+        else:
+            jump_to_end = self.emit(JUMP)
+            self.patch(jump_to_alternate)
+            self.compile(node.alternate)
+            self.patch(jump_to_end)
+
+    def compile_expression_statement(self, node: ExpressionStatement):
+        if node.expression.node_class is AssignmentExpression:
+            # The assigned value is not needed: store it without a copy
+            self.compile_assignment_expression(node.expression, keep_value=False)
+        else:
+            self.compile(node.expression)
+            self.emit(POP_TOP)
+
+    def compile_assignment_expression(self, node: AssignmentExpression, keep_value: bool = True):
+        target = node.left
+        while target.node_class is GroupedExpression or target.node_class is PrimaryExpression:
+            target = target.expression if target.node_class is GroupedExpression else target.value
+        if target.node_class is not Identifier:
+            raise SyntaxError(f"Invalid left-hand side in assignment expression: {target}")
+
+        slot = self.slot(target.name)
+        if node.operator == "=":
+            self.compile(node.right)
+        else:
+            self.emit(LOAD_SLOT, slot)
+            self.compile(node.right)
+            self.emit(BINARY_OP, OPERATOR_INDICES[COMPOUND_ASSIGNMENT_OPERATORS[node.operator]])
+
+        if keep_value:
+            self.emit(DUP_TOP)
+        self.emit(STORE_SLOT, slot)
+
+    def compile_binary_expression(self, node: BinaryExpression):
+        self.compile(node.left)
+        self.compile(node.right)
+        self.emit(BINARY_OP, OPERATOR_INDICES[node.operator])
+
+    def compile_logical_expression(self, node: LogicalExpression):
+        self.compile(node.left)
+        jump = self.emit(JUMP_IF_FALSE_OR_POP if node.operator == "and" else JUMP_IF_TRUE_OR_POP)
+        self.compile(node.right)
+        self.patch(jump)
+
+    def compile_primary_expression(self, node: PrimaryExpression):
+        self.compile(node.value)
+
+    def compile_grouped_expression(self, node: GroupedExpression):
+        self.compile(node.expression)
+
+    def compile_literal(self, node: Node):
+        self.emit(LOAD_CONST, self.constant(node.value))
+
+    def compile_string_literal(self, node: StringLiteral):
+        self.emit(LOAD_CONST, self.constant(string_value(node.value)))
+
+    def compile_null_literal(self, node: NullLiteral):
+        self.emit(LOAD_CONST, self.constant(None))
+
+    def compile_identifier(self, node: Identifier):
+        self.emit(LOAD_SLOT, self.slot(node.name))
+
+
+def compile_program(program: Program) -> Code:
+    return Compiler().compile_program(program)
+
+
+def execute(code: Code, values: List[Any]):
+    """
+    Runs `code` over the slot values `values`, updated in place. The
+    dispatch loop tests the opcodes, bound to locals, most frequent first.
+    """
+    load_slot, load_const, store_slot, binary_op = LOAD_SLOT, LOAD_CONST, STORE_SLOT, BINARY_OP
+    jump_if_false, jump, dup_top, pop_top = JUMP_IF_FALSE, JUMP, DUP_TOP, POP_TOP
+    jump_if_false_or_pop, jump_if_true_or_pop = JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP
+    instructions = code.instructions
+    constants = code.constants
+    functions = OPERATOR_FUNCTIONS
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    pc = 0
+    end = len(instructions)
+
+    while pc < end:
+        opcode = instructions[pc]
+        arg = instructions[pc + 1]
+        pc += 2
+
+        if opcode == load_slot:
+            push(values[arg])
+        elif opcode == load_const:
+            push(constants[arg])
+        elif opcode == store_slot:
+            values[arg] = pop()
+        elif opcode == binary_op:
+            right = pop()
+            stack[-1] = functions[arg](stack[-1], right)
+        elif opcode == jump_if_false:
+            if not pop():
+                pc = arg
+        elif opcode == jump:
+            pc = arg
+        elif opcode == jump_if_false_or_pop:
+            if stack[-1]:
+                pop()
+            else:
+                pc = arg
+        elif opcode == jump_if_true_or_pop:
+            if stack[-1]:
+                pc = arg
+            else:
+                pop()
+        elif opcode == dup_top:
+            push(stack[-1])
+        elif opcode == pop_top:
+            pop()
+        else:
+            raise ValueError(f"Unknown opcode {opcode} at {pc - 2}")
+
+
+def run(code: Code, inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Runs `code` with fresh variables, set from `inputs` by name (others
+    start as nil), and returns every variable of the program by name.
+    Inputs the program does not use are ignored.
+    """
+    values = [None] * len(code.names)
+    if inputs:
+        slots = code.slots
+        for name, value in inputs.items():
+            slot = slots.get(name)
+            if slot is not None:
+                values[slot] = value
+
+    execute(code, values)
+
+    return dict(zip(code.names, values))
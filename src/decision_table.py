@@ -0,0 +1,241 @@
+"""
+Decision tables for runs of `if` statements testing one variable.
+
+Rule programs are often sequences, or `else if` chains, of statements like
+
+    if evo_cond == "solar_stone" then eevee = "leafeon"
+    if evo_cond == "friendship_at_night" then eevee = "umbreon" else eevee = "espeon"
+
+Each test compares the same variable with a constant. As long as no
+statement of the run assigns that variable, its value decides every test,
+so the run can be resolved ahead of time for each constant it is compared
+with, plus a default for the values equal to none of them. Running the
+run is then one dict lookup on the variable followed by the statements of
+the matching case, however many tests there are.
+
+Tests are resolved with Python's `==`, and dict lookups find a key equal to
+the value, so both agree on which constants a value matches. Runs of any
+other shape are left to normal evaluation.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from node import (
+    AssignmentExpression,
+    BinaryExpression,
+    BlockStatement,
+    BoolLiteral,
+    ExpressionStatement,
+    FloatLiteral,
+    GroupedExpression,
+    Identifier,
+    IfStatement,
+    IntegerLiteral,
+    LogicalExpression,
+    Node,
+    NullLiteral,
+    PrimaryExpression,
+    Program,
+    StringLiteral,
+    VariableStatement,
+    string_value,
+)
+
+# Fewest tests worth a table: a single test is as cheap as a lookup
+MIN_TESTS = 2
+# Most statements across the cases of a table, as runs of `if`/`else`
+# statements copy each `else` branch into every case but one
+MAX_STATEMENTS = 4096
+
+LITERALS = (IntegerLiteral, FloatLiteral, StringLiteral, BoolLiteral, NullLiteral)
+
+
+class DecisionTable(NamedTuple):
+    """
+    The statements to run for each value of `name`: `cases` by constant,
+    and `default` for values equal to none of them, in place of the run of
+    `statements`.
+    """
+
+    name: str
+    cases: Dict[Any, List[Node]]
+    default: List[Node]
+    statements: List[Node]
+
+
+class Test(NamedTuple):
+    """A condition comparing variable `name` with a constant."""
+
+    name: str
+    value: Any
+    equal: bool
+
+    def resolve(self, value: Any) -> bool:
+        return (value == self.value) == self.equal
+
+
+def unwrap(node: Node) -> Node:
+    while node.node_class is GroupedExpression or node.node_class is PrimaryExpression:
+        node = node.expression if node.node_class is GroupedExpression else node.value
+
+    return node
+
+
+def constant(node: Node) -> Tuple[bool, Any]:
+    """Whether `node` is a literal, and its value."""
+    if node.node_class not in LITERALS:
+        return False, None
+    if node.node_class is StringLiteral:
+        return True, string_value(node.value)
+    if node.node_class is NullLiteral:
+        return True, None
+
+    return True, node.value
+
+
+def equality_test(condition: Node) -> Optional[Test]:
+    """The Test of `condition` if it is `variable ==/!= constant`, either way round."""
+    condition = unwrap(condition)
+    if condition.node_class is not BinaryExpression or condition.operator not in ("==", "!="):
+        return None
+
+    left = unwrap(condition.left)
+    right = unwrap(condition.right)
+    if left.node_class is not Identifier:
+        left, right = right, left
+    is_constant, value = constant(right)
+    if left.node_class is not Identifier or not is_constant:
+        return None
+
+    return Test(left.name, value, condition.operator == "==")
+
+
+def assigns(node: Node, name: str) -> bool:
+    """
+    Whether running `node` may assign variable `name`. Nodes it does not
+    know are assumed to.
+    """
+    node_class = node.node_class
+    if node_class is Program or node_class is BlockStatement:
+        return any(assigns(statement, name) for statement in node.statements)
+    if node_class is IfStatement:
+        branches = (node.condition, node.consequent) if node.alternate is None else (node.condition, node.consequent, node.alternate)
+        return any(assigns(branch, name) for branch in branches)
+    if node_class is VariableStatement:
+        return any(
+            declaration.identifier.name == name or (declaration.initializer is not None and assigns(declaration.initializer, name))
+            for declaration in node.declarations
+        )
+    if node_class is ExpressionStatement:
+        return assigns(node.expression, name)
+    if node_class is AssignmentExpression:
+        target = unwrap(node.left)
+        return target.node_class is not Identifier or target.name == name or assigns(node.right, name)
+    if node_class is BinaryExpression or node_class is LogicalExpression:
+        return assigns(node.left, name) or assigns(node.right, name)
+    if node_class is PrimaryExpression:
+        return assigns(node.value, name)
+    if node_class is GroupedExpression:
+        return assigns(node.expression, name)
+
+    return node_class is not Identifier and node_class not in LITERALS
+
+
+def collect_constants(statements: List[Node], name: str, constants: Dict[Any, None]) -> int:
+    """
+    Adds to `constants` the constants `name` is tested against by the `if`
+    statements that a table would resolve, and returns how many tests
+    there are.
+    """
+    tests = 0
+    for statement in statements:
+        if statement.node_class is BlockStatement:
+            tests += collect_constants(statement.statements, name, constants)
+        elif statement.node_class is IfStatement:
+            test = equality_test(statement.condition)
+            if test is None or test.name != name:
+                continue
+            tests += 1
+            constants.setdefault(test.value)
+            tests += collect_constants([statement.consequent], name, constants)
+            if statement.alternate is not None:
+                tests += collect_constants([statement.alternate], name, constants)
+
+    return tests
+
+
+def specialize(statements: List[Node], name: str, matches) -> List[Node]:
+    """
+    The statements that `statements` run when variable `name` passes the
+    tests `matches` accepts, with the tests on it resolved and blocks,
+    which open no scope, flattened.
+    """
+    specialized = []
+    for statement in statements:
+        if statement.node_class is BlockStatement:
+            specialized.extend(specialize(statement.statements, name, matches))
+            continue
+
+        test = equality_test(statement.condition) if statement.node_class is IfStatement else None
+        if test is None or test.name != name:
+            specialized.append(statement)
+        elif matches(test):
+            specialized.extend(specialize([statement.consequent], name, matches))
+        elif statement.alternate is not None:
+            specialized.extend(specialize([statement.alternate], name, matches))
+
+    return specialized
+
+
+def build_table(statements: List[Node], name: str) -> Optional[DecisionTable]:
+    """
+    The table of `statements` on variable `name`, unless too few tests use
+    it or it would be too large.
+    """
+    constants: Dict[Any, None] = {}
+    if collect_constants(statements, name, constants) < MIN_TESTS:
+        return None
+
+    cases = {}
+    for value in constants:
+        cases[value] = specialize(statements, name, lambda test: test.resolve(value))
+    # Values equal to none of the constants fail every `==` and pass every `!=`
+    default = specialize(statements, name, lambda test: not test.equal)
+
+    if sum(map(len, cases.values())) + len(default) > MAX_STATEMENTS:
+        return None
+
+    return DecisionTable(name, cases, default, statements)
+
+
+def split_runs(statements: List[Node]) -> List[Any]:
+    """
+    `statements`, with each run of consecutive `if` statements testing one
+    variable, which none of them assigns, replaced by its DecisionTable.
+    """
+    result = []
+    index = 0
+    while index < len(statements):
+        statement = statements[index]
+        test = equality_test(statement.condition) if statement.node_class is IfStatement else None
+        if test is None:
+            result.append(statement)
+            index += 1
+            continue
+
+        end = index
+        while end < len(statements):
+            candidate = statements[end]
+            candidate_test = equality_test(candidate.condition) if candidate.node_class is IfStatement else None
+            if candidate_test is None or candidate_test.name != test.name or assigns(candidate, test.name):
+                break
+            end += 1
+
+        table = build_table(statements[index:end], test.name) if end > index else None
+        if table is None:
+            result.append(statement)
+            index += 1
+        else:
+            result.append(table)
+            index = end
+
+    return result
@@ -0,0 +1,269 @@
+"""
+Evaluation of programs.
+
+Variables live in one flat global scope: blocks do not open scopes.
+Variables start as nil (None), or as the value given for them as an input,
+and a declaration without an initializer leaves its variable as it is, so
+`let level` declares an input `level` without clearing it. Values are Python values: `and`/`or` short-circuit and
+return one of their operands, conditions use Python truthiness, `/` is true
+division, and errors such as a division by zero are Python exceptions.
+"""
+import operator
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from decision_table import DecisionTable, split_runs
+from node import (
+    AssignmentExpression,
+    BinaryExpression,
+    BlockStatement,
+    BoolLiteral,
+    ExpressionStatement,
+    FloatLiteral,
+    GroupedExpression,
+    Identifier,
+    IfStatement,
+    IntegerLiteral,
+    LogicalExpression,
+    Node,
+    NullLiteral,
+    PrimaryExpression,
+    Program,
+    StringLiteral,
+    VariableStatement,
+    string_value,
+)
+
+BINARY_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+}
+
+# Compound assignment operators and the binary operator they apply
+COMPOUND_ASSIGNMENT_OPERATORS = {
+    "+=": "+",
+    "-=": "-",
+    "*=": "*",
+    "/=": "/",
+}
+
+
+class Evaluator:
+    """
+    Runs programs by first compiling every node, through a dispatch table
+    keyed on its `node_class`, into a closure over its compiled children.
+    Compiling resolves each variable name to an index in `values`, so at
+    run time a variable access is a list index, and no node is inspected
+    again however often it runs.
+
+    Runs of `if` statements testing one variable against constants are
+    compiled to a dict lookup on its value (see `decision_table`), unless
+    `decision_tables` is false.
+
+    Values persist across `evaluate` calls on the same evaluator.
+    """
+
+    def __init__(self, decision_tables: bool = True):
+        self.decision_tables = decision_tables
+        # Variable name -> index of its value in `values`
+        self.slots: Dict[str, int] = {}
+        self.values: List[Any] = []
+        self.compilers: Dict[type, Callable[[Node], Callable[[], Any]]] = {
+            Program: self.compile_block,
+            BlockStatement: self.compile_block,
+            VariableStatement: self.compile_variable_statement,
+            IfStatement: self.compile_if_statement,
+            ExpressionStatement: self.compile_expression_statement,
+            AssignmentExpression: self.compile_assignment_expression,
+            BinaryExpression: self.compile_binary_expression,
+            LogicalExpression: self.compile_logical_expression,
+            PrimaryExpression: self.compile_primary_expression,
+            GroupedExpression: self.compile_grouped_expression,
+            IntegerLiteral: self.compile_literal,
+            FloatLiteral: self.compile_literal,
+            StringLiteral: self.compile_string_literal,
+            BoolLiteral: self.compile_literal,
+            NullLiteral: self.compile_null_literal,
+            Identifier: self.compile_identifier,
+        }
+
+    def evaluate(self, program: Program, inputs: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Runs `program`, after setting its variables named in `inputs` to
+        their value there, and returns the value of every variable by name.
+        Inputs the program does not use are ignored.
+        """
+        run = self.compile(program)
+        if inputs:
+            values = self.values
+            for name, value in inputs.items():
+                slot = self.slots.get(name)
+                if slot is not None:
+                    values[slot] = value
+        run()
+
+        return self.variables()
+
+    def variables(self) -> Dict[str, Any]:
+        values = self.values
+        return {name: values[slot] for name, slot in self.slots.items()}
+
+    def compile(self, node: Node) -> Callable[[], Any]:
+        compiler = self.compilers.get(node.node_class)
+        if compiler is None:
+            raise TypeError(f"Cannot evaluate {node.node_class.__name__}")
+
+        return compiler(node)
+
+    def slot(self, name: str) -> int:
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.values)
+            self.values.append(None)
+
+        return slot
+
+    def compile_block(self, node: Node) -> Callable[[], None]:
+        return self.compile_statements(node.statements)
+
+    def compile_statements(self, statements: List[Node]) -> Callable[[], None]:
+        if self.decision_tables:
+            statements = split_runs(statements)
+        compiled = tuple(
+            self.compile_decision_table(statement) if isinstance(statement, DecisionTable) else self.compile(statement)
+            for statement in statements
+        )
+
+        def run_block():
+            for statement in compiled:
+                statement()
+
+        return run_block
+
+    def compile_decision_table(self, table: DecisionTable) -> Callable[[], None]:
+        values = self.values
+        slot = self.slot(table.name)
+        # Only for the variables of branches that no case runs
+        for statement in table.statements:
+            self.compile(statement)
+        cases = {value: self.compile_statements(statements) for value, statements in table.cases.items()}
+        default = self.compile_statements(table.default)
+
+        def run_decision_table():
+            cases.get(values[slot], default)()
+
+        return run_decision_table
+
+    def compile_variable_statement(self, node: VariableStatement) -> Callable[[], None]:
+        values = self.values
+        declarations = []
+        for declaration in node.declarations:
+            slot = self.slot(declaration.identifier.name)
+            # Without an initializer, the variable keeps its value
+            if declaration.initializer:
+                declarations.append((slot, self.compile(declaration.initializer)))
+        declarations = tuple(declarations)
+
+        def run_variable_statement():
+            for slot, initializer in declarations:
+                values[slot] = initializer()
+
+        return run_variable_statement
+
+    def compile_if_statement(self, node: IfStatement) -> Callable[[], None]:
+        condition = self.compile(node.condition)
+        consequent = self.compile(node.consequent)
+
+        if node.alternate is None:
+            def run_if():
+                if condition():
+                    consequent()
+        else:
+            alternate = self.compile(node.alternate)
+
+            def run_if():
+                if condition():
+                    consequent()
+                else:
+                    alternate()
+
+        return run_if
+
+    def compile_expression_statement(self, node: ExpressionStatement) -> Callable[[], Any]:
+        return self.compile(node.expression)
+
+    def compile_assignment_expression(self, node: AssignmentExpression) -> Callable[[], Any]:
+        target = node.left
+        while target.node_class is GroupedExpression or target.node_class is PrimaryExpression:
+            target = target.expression if target.node_class is GroupedExpression else target.value
+        if target.node_class is not Identifier:
+            raise SyntaxError(f"Invalid left-hand side in assignment expression: {target}")
+
+        values = self.values
+        slot = self.slot(target.name)
+        right = self.compile(node.right)
+
+        if node.operator == "=":
+            def run_assignment():
+                value = values[slot] = right()
+                return value
+        else:
+            apply = BINARY_OPERATORS[COMPOUND_ASSIGNMENT_OPERATORS[node.operator]]
+
+            def run_assignment():
+                value = values[slot] = apply(values[slot], right())
+                return value
+
+        return run_assignment
+
+    def compile_binary_expression(self, node: BinaryExpression) -> Callable[[], Any]:
+        apply = BINARY_OPERATORS[node.operator]
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+
+        return lambda: apply(left(), right())
+
+    def compile_logical_expression(self, node: LogicalExpression) -> Callable[[], Any]:
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+
+        if node.operator == "and":
+            return lambda: left() and right()
+
+        return lambda: left() or right()
+
+    def compile_primary_expression(self, node: PrimaryExpression) -> Callable[[], Any]:
+        return self.compile(node.value)
+
+    def compile_grouped_expression(self, node: GroupedExpression) -> Callable[[], Any]:
+        return self.compile(node.expression)
+
+    def compile_literal(self, node: Node) -> Callable[[], Any]:
+        value = node.value
+        return lambda: value
+
+    def compile_string_literal(self, node: StringLiteral) -> Callable[[], str]:
+        value = string_value(node.value)
+        return lambda: value
+
+    def compile_null_literal(self, node: NullLiteral) -> Callable[[], None]:
+        return lambda: None
+
+    def compile_identifier(self, node: Identifier) -> Callable[[], Any]:
+        values = self.values
+        slot = self.slot(node.name)
+
+        return lambda: values[slot]
+
+
+def evaluate(program: Program, inputs: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """Runs `program` on a fresh Evaluator and returns its variables by name."""
+    return Evaluator().evaluate(program, inputs)
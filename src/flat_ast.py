@@ -0,0 +1,336 @@
+from array import array
+from typing import Any, Dict, List, Optional
+
+from node import (
+    AssignmentExpression,
+    BinaryExpression,
+    BlockStatement,
+    BoolLiteral,
+    ExpressionStatement,
+    FloatLiteral,
+    GroupedExpression,
+    Identifier,
+    IfStatement,
+    IntegerLiteral,
+    LogicalExpression,
+    Node,
+    NullLiteral,
+    PrimaryExpression,
+    Program,
+    StringLiteral,
+    VariableDeclaration,
+    VariableStatement,
+)
+
+# Node kinds: a node's kind is the index of its class in this tuple
+NODE_CLASSES = (
+    Program,
+    BlockStatement,
+    VariableStatement,
+    VariableDeclaration,
+    IfStatement,
+    ExpressionStatement,
+    AssignmentExpression,
+    BinaryExpression,
+    LogicalExpression,
+    PrimaryExpression,
+    GroupedExpression,
+    IntegerLiteral,
+    FloatLiteral,
+    StringLiteral,
+    BoolLiteral,
+    NullLiteral,
+    Identifier,
+)
+NODE_KINDS = {node_class: kind for kind, node_class in enumerate(NODE_CLASSES)}
+
+# Operator ids: an operator's id is its index in this tuple, 0 meaning none
+OPERATORS = (
+    "", "=", "+=", "-=", "*=", "/=", "or", "and",
+    "==", "!=", "<", "<=", ">", ">=", "+", "-", "*", "/", "%",
+)
+OPERATOR_IDS = {operator: operator_id for operator_id, operator in enumerate(OPERATORS)}
+
+# How the fields of a node class map onto the arrays
+LIST = 0      # One list field: the children are its items
+OPERATOR = 1  # An operator, then fixed child fields
+VALUE = 2     # A single constant, no children
+CHILDREN = 3  # Fixed child fields, -1 standing for None
+
+LAYOUTS = {
+    Program: LIST,
+    BlockStatement: LIST,
+    VariableStatement: LIST,
+    AssignmentExpression: OPERATOR,
+    BinaryExpression: OPERATOR,
+    LogicalExpression: OPERATOR,
+    IntegerLiteral: VALUE,
+    FloatLiteral: VALUE,
+    StringLiteral: VALUE,
+    BoolLiteral: VALUE,
+    Identifier: VALUE,
+}
+
+NO_NODE = -1
+
+
+class FlatAST:
+    """
+    An AST stored as parallel typed arrays rather than one Python object
+    per node. Node `i` has kind `kinds[i]`, operator `operators[i]`, constant
+    `constants[values[i]]` and children `children[child_starts[i]:][:child_counts[i]]`,
+    which are node indices. `token_indices[i]` is the index of the last
+    token the node was parsed from, or -1.
+
+    Children are always added before their parent, so the root comes last.
+    `node(i)` and `root` return lightweight views exposing the same
+    attributes as the `node.py` classes.
+    """
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.operators = array("B")
+        self.child_starts = array("I")
+        self.child_counts = array("I")
+        self.token_indices = array("i")
+        self.values = array("i")
+        self.children = array("i")
+        self.constants: List[Any] = []
+        self.constant_ids: Dict[Any, int] = {}
+        self.root_index = NO_NODE
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add(self, kind: int, operator: str = "", children=(), value: Any = None, token_index: int = -1) -> int:
+        self.kinds.append(kind)
+        self.operators.append(OPERATOR_IDS[operator])
+        self.child_starts.append(len(self.children))
+        self.child_counts.append(len(children))
+        self.token_indices.append(token_index)
+        self.values.append(NO_NODE if value is None else self.add_constant(value))
+        self.children.extend(children)
+
+        return len(self.kinds) - 1
+
+    def add_constant(self, value: Any) -> int:
+        # Keyed by type as well, since 1, 1.0 and True are equal dict keys
+        key = (type(value), value)
+        constant_id = self.constant_ids.get(key)
+        if constant_id is None:
+            constant_id = self.constant_ids[key] = len(self.constants)
+            self.constants.append(value)
+
+        return constant_id
+
+    def node(self, index: int) -> Optional["FlatNode"]:
+        if index == NO_NODE:
+            return None
+
+        return VIEW_CLASSES[self.kinds[index]](self, index)
+
+    @property
+    def root(self) -> Optional["FlatNode"]:
+        return self.node(self.root_index)
+
+    def child_indices(self, index: int) -> array:
+        start = self.child_starts[index]
+        return self.children[start:start + self.child_counts[index]]
+
+    @classmethod
+    def from_tree(cls, program: Program) -> "FlatAST":
+        ast = cls()
+        # Iterative post-order walk: a node is added once all its children are
+        stack = [(program, False)]
+        indices = []
+
+        while stack:
+            node, expanded = stack.pop()
+            if node is None:
+                indices.append(NO_NODE)
+                continue
+
+            node_class = node.node_class
+            layout = LAYOUTS.get(node_class, CHILDREN)
+            fields = node_class.__slots__
+
+            if layout == VALUE:
+                indices.append(ast.add(NODE_KINDS[node_class], value=getattr(node, fields[0])))
+                continue
+
+            if layout == LIST:
+                child_nodes = getattr(node, fields[0])
+            elif layout == OPERATOR:
+                child_nodes = [getattr(node, field) for field in fields[1:]]
+            else:
+                child_nodes = [getattr(node, field) for field in fields]
+
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(child_nodes))
+                continue
+
+            children = indices[len(indices) - len(child_nodes):]
+            del indices[len(indices) - len(child_nodes):]
+            operator = node.operator if layout == OPERATOR else ""
+            indices.append(ast.add(NODE_KINDS[node_class], operator, children))
+
+        ast.root_index = indices[-1]
+        return ast
+
+    def to_tree(self) -> Optional[Node]:
+        """
+        Rebuilds `node.py` objects. Children precede their parents in the
+        arrays, so a single forward pass suffices.
+        """
+        nodes: List[Optional[Node]] = []
+
+        for index, kind in enumerate(self.kinds):
+            node_class = NODE_CLASSES[kind]
+            layout = LAYOUTS.get(node_class, CHILDREN)
+            children = [None if child == NO_NODE else nodes[child] for child in self.child_indices(index)]
+
+            if layout == LIST:
+                nodes.append(node_class(children))
+            elif layout == OPERATOR:
+                nodes.append(node_class(OPERATORS[self.operators[index]], *children))
+            elif layout == VALUE:
+                nodes.append(node_class(self.constants[self.values[index]]))
+            else:
+                nodes.append(node_class(*children))
+
+        return None if self.root_index == NO_NODE else nodes[self.root_index]
+
+
+class FlatNode:
+    """
+    View of node `index` of a FlatAST. Subclasses, one per node class,
+    expose that class's fields as properties reading the arrays.
+    """
+
+    __slots__ = ("ast", "index")
+
+    node_class = Node
+
+    def __init__(self, ast: FlatAST, index: int):
+        self.ast = ast
+        self.index = index
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FlatNode) and self.ast is other.ast and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.ast), self.index))
+
+
+def list_field():
+    def get(self):
+        return [self.ast.node(child) for child in self.ast.child_indices(self.index)]
+    return property(get)
+
+
+def child_field(position: int):
+    def get(self):
+        ast = self.ast
+        return ast.node(ast.children[ast.child_starts[self.index] + position])
+    return property(get)
+
+
+def operator_field():
+    def get(self):
+        return OPERATORS[self.ast.operators[self.index]]
+    return property(get)
+
+
+def value_field():
+    def get(self):
+        return self.ast.constants[self.ast.values[self.index]]
+    return property(get)
+
+
+def make_view_class(node_class) -> type:
+    layout = LAYOUTS.get(node_class, CHILDREN)
+    fields = node_class.__slots__
+    namespace = {"__slots__": (), "node_class": node_class, "__str__": node_class.__str__}
+
+    if layout == LIST:
+        namespace[fields[0]] = list_field()
+    elif layout == OPERATOR:
+        namespace[fields[0]] = operator_field()
+        for position, field in enumerate(fields[1:]):
+            namespace[field] = child_field(position)
+    elif layout == VALUE:
+        namespace[fields[0]] = value_field()
+    else:
+        for position, field in enumerate(fields):
+            namespace[field] = child_field(position)
+
+    return type(f"Flat{node_class.__name__}", (FlatNode,), namespace)
+
+
+VIEW_CLASSES = tuple(make_view_class(node_class) for node_class in NODE_CLASSES)
+
+
+class FlatBuilder:
+    """
+    Parser builder (see `token_parser.TreeBuilder`) that appends every node
+    to a FlatAST and hands back its index. Building the Program returns the
+    finished FlatAST.
+    """
+
+    def __init__(self, parser=None):
+        self.ast = FlatAST()
+        self.parser = parser
+
+    def add(self, node_class, operator: str = "", children=(), value: Any = None) -> int:
+        token_index = self.parser.current_token_idx - 1 if self.parser is not None else -1
+        return self.ast.add(NODE_KINDS[node_class], operator, children, value, token_index)
+
+    def is_identifier(self, node: int) -> bool:
+        return self.ast.kinds[node] == NODE_KINDS[Identifier]
+
+    def Program(self, statements: List[int]) -> FlatAST:
+        self.ast.root_index = self.add(Program, children=statements)
+        return self.ast
+
+    def BlockStatement(self, statements: List[int]) -> int:
+        return self.add(BlockStatement, children=statements)
+
+    def VariableStatement(self, declarations: List[int]) -> int:
+        return self.add(VariableStatement, children=declarations)
+
+    def VariableDeclaration(self, identifier: int, initializer: Optional[int] = None) -> int:
+        return self.add(VariableDeclaration, children=(identifier, NO_NODE if initializer is None else initializer))
+
+    def IfStatement(self, condition: int, consequent: int, alternate: Optional[int] = None) -> int:
+        return self.add(IfStatement, children=(condition, consequent, NO_NODE if alternate is None else alternate))
+
+    def ExpressionStatement(self, expression: int) -> int:
+        return self.add(ExpressionStatement, children=(expression,))
+
+    def AssignmentExpression(self, operator: str, left: int, right: int) -> int:
+        return self.add(AssignmentExpression, operator, (left, right))
+
+    def BinaryExpression(self, operator: str, left: int, right: int) -> int:
+        return self.add(BinaryExpression, operator, (left, right))
+
+    def LogicalExpression(self, operator: str, left: int, right: int) -> int:
+        return self.add(LogicalExpression, operator, (left, right))
+
+    def IntegerLiteral(self, value: int) -> int:
+        return self.add(IntegerLiteral, value=value)
+
+    def FloatLiteral(self, value: float) -> int:
+        return self.add(FloatLiteral, value=value)
+
+    def StringLiteral(self, value: str) -> int:
+        return self.add(StringLiteral, value=value)
+
+    def BoolLiteral(self, value: bool) -> int:
+        return self.add(BoolLiteral, value=value)
+
+    def NullLiteral(self) -> int:
+        return self.add(NullLiteral)
+
+    def Identifier(self, name: str) -> int:
+        return self.add(Identifier, value=name)
@@ -1,9 +1,29 @@
+import mmap
 import re
-from typing import List, NamedTuple
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+
+# Every token type, indexed by its `id`
+token_types: List["TokenType"] = []
 
 
 class TokenType(str):
-    pass
+    """
+    Compares equal to its name. Each type also carries a small integer `id`,
+    its index in `token_types`, for compact storage and table lookups.
+    """
+
+    def __new__(cls, name: str):
+        token_type = super().__new__(cls, name)
+        token_type.id = len(token_types)
+        token_types.append(token_type)
+        return token_type
 
 
 class Token(NamedTuple):
@@ -85,131 +105,668 @@ keywords = {
 }
 
 
+bytes_keywords = {keyword.encode(): token_type for keyword, token_type in keywords.items()}
+
+
 def lookup_ident(ident: str) -> TokenType:
     return keywords.get(ident, IDENT)
 
 
+# Source types that hold a whole program, as opposed to a stream of lines.
+TEXT_TYPES = (str, bytes, bytearray, mmap.mmap)
+Text = Union[str, bytes, bytearray, mmap.mmap]
+
+
+# Token patterns, tried in order: the first alternative that matches wins,
+# so longer operators must come before their prefixes.
+token_patterns = [
+    # -----------------------------------------------
+    # Whitespaces
+    (r"[ \t]+", WHITESPACE),
+    (r"\n", CR),
+    # -----------------------------------------------
+    # Comments
+    (r"\^#[^\n]*", COMMENT),
+    # -----------------------------------------------
+    # Logical operators
+    # -----------------------------------------------
+    (r"\&\&", AND),
+    (r"\|\|", OR),
+    # Comparison operators
+    (r"\=\=", EQ),
+    (r"\!\=", NOT_EQ),
+    (r"\<\=", LT_EQ),
+    (r"\>\=", GT_EQ),
+    (r"\<", LT),
+    (r"\>", GT),
+    # -----------------------------------------------
+    # -----------------------------------------------
+    # Symbols, delimiters
+    (r"\;", SEMI),
+    (r"\,", COMMA),
+    (r"\:", COLON),
+    (r"\(", LPAREN),
+    (r"\)", RPAREN),
+    (r"\{", LBRACE),
+    (r"\}", RBRACE),
+    (r"\[", LBRACKET),
+    (r"\]", RBRACKET),
+    (r"\!", BANG),
+    # -----------------------------------------------
+    # Identifiers
+    (r"[a-zA-Z_][a-zA-Z0-9_]*", IDENT),
+    # Assignment operators
+    (r"\=", ASSIGN),
+    (r"\+\=", PLUS_ASSIGN),
+    (r"\-\=", MINUS_ASSIGN),
+    (r"\*\=", STAR_ASSIGN),
+    (r"\/\=", SLASH_ASSIGN),
+    # -----------------------------------------------
+    # Math operators
+    (r"\+", PLUS),
+    (r"\-", MINUS),
+    (r"\*", STAR),
+    (r"\/", SLASH),
+    (r"\%", PERCENT),
+    # -----------------------------------------------
+    # Literals
+    (r"\d+\.\d+", FLOAT),
+    (r"\d+", INT),
+    (r"\".*?\"", STRING),
+    # -----------------------------------------------
+    # Anything else is a single illegal character
+    (r".", ILLEGAL),
+]
+
+# Compile all patterns into a single alternation. Each pattern gets a named
+# group so the matching token type can be recovered from `match.lastgroup`.
+token_groups = {f"T{index}": token_type for index, (_, token_type) in enumerate(token_patterns)}
+TOKEN_PATTERN = re.compile("|".join(
+    f"(?P<T{index}>{pattern})" for index, (pattern, _) in enumerate(token_patterns)
+))
+
+# Leading whitespace of a line, which sets its indentation level.
+INDENT_PATTERN = re.compile(r"[^\S\n]*")
+
+# The same patterns for UTF-8 encoded sources, such as memory-mapped files.
+# An illegal character spans all the bytes of its UTF-8 sequence.
+ILLEGAL_UTF8 = r"[\xc0-\xff][\x80-\xbf]*|."
+BYTES_TOKEN_PATTERN = re.compile("|".join(
+    f"(?P<T{index}>{ILLEGAL_UTF8 if token_type is ILLEGAL else pattern})"
+    for index, (pattern, token_type) in enumerate(token_patterns)
+).encode())
+BYTES_INDENT_PATTERN = re.compile(rb"[^\S\n]*")
+
+# A newline starting a line with no indentation, where the indentation
+# stack is back to [0] and the source can be split for parallel lexing.
+TOP_LEVEL_PATTERN = re.compile(r"\n(?![^\S\n])")
+BYTES_TOP_LEVEL_PATTERN = re.compile(rb"\n(?![^\S\n])")
+
+
+class TokenBuffer(Sequence):
+    """
+    Token storage as parallel arrays of type ids, source offsets, lines and
+    columns instead of one `Token` tuple (and literal string) per token.
+    Indexing and iterating build `Token`s on access, slicing their literal
+    out of the source, so a buffer stands in for a list of tokens.
+    """
+
+    def __init__(self, source: Text):
+        self.source = source
+        self.types = array("B")
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self.lines = array("I")
+        self.columns = array("I")
+
+    def append(self, token_type: TokenType, start: int, end: int, line: int, column: int):
+        self.types.append(token_type.id)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.columns.append(column)
+
+    def literal(self, index: int) -> str:
+        literal = self.source[self.starts[index]:self.ends[index]]
+        return literal if isinstance(literal, str) else literal.decode()
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        return Token(token_types[self.types[index]], self.literal(index), self.lines[index], self.columns[index])
+
+    def __iter__(self) -> Iterator[Token]:
+        source = self.source
+        encoded = not isinstance(source, str)
+
+        for type_id, start, end, line, column in zip(self.types, self.starts, self.ends, self.lines, self.columns):
+            literal = source[start:end]
+            if encoded:
+                literal = literal.decode()
+            yield Token(token_types[type_id], literal, line, column)
+
+
+class TokenList(Sequence):
+    """
+    A list of `Token`s that `Lexer.relex` edits in place. When an edit adds
+    or removes lines, the tokens after it are not rewritten: their line
+    numbers are corrected on access from a table of line shifts, each
+    applying from one token index to the next. The table is folded into
+    the tokens once it grows past `MAX_SHIFTS` entries.
+
+    Iterating with no shift pending hands out the list's own iterator, so
+    a fresh token list is read as fast as a plain list.
+    """
+
+    MAX_SHIFTS = 256
+
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        # Token index from which each shift applies, ascending, and the
+        # number of lines it adds (up to the next index)
+        self.shift_starts: List[int] = []
+        self.shifts: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        token = self.tokens[index]
+        if not self.shift_starts:
+            return token
+        if index < 0:
+            index += len(self.tokens)
+
+        shift = self.shift_at(index)
+        return Token(token.type, token.literal, token.line + shift, token.column) if shift else token
+
+    def __iter__(self) -> Iterator[Token]:
+        if not self.shift_starts:
+            return iter(self.tokens)
+
+        return self.iter_shifted()
+
+    def __eq__(self, other):
+        if isinstance(other, (TokenList, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+        return NotImplemented
+
+    def iter_shifted(self) -> Iterator[Token]:
+        tokens = self.tokens
+        yield from tokens[:self.shift_starts[0]]
+
+        ends = self.shift_starts[1:] + [len(tokens)]
+        for start, end, shift in zip(self.shift_starts, ends, self.shifts):
+            if not shift:
+                yield from tokens[start:end]
+                continue
+            for index in range(start, end):
+                token = tokens[index]
+                yield Token(token.type, token.literal, token.line + shift, token.column)
+
+    def shift_at(self, index: int) -> int:
+        position = bisect_right(self.shift_starts, index)
+        return self.shifts[position - 1] if position else 0
+
+    def splice(self, start: int, end: int, tokens: List[Token], line_delta: int):
+        """
+        Replaces `self[start:end]` with `tokens`, whose lines are final,
+        and moves the tokens after them `line_delta` lines down.
+        """
+        starts, shifts = self.shift_starts, self.shifts
+        if not starts and not line_delta:
+            self.tokens[start:end] = tokens
+            return
+
+        new_end = start + len(tokens)
+        index_delta = new_end - end
+        head = bisect_left(starts, start)
+        tail = bisect_left(starts, end)
+        tail_shift = self.shift_at(end) + line_delta
+
+        new_starts = starts[:head] + [start, new_end]
+        new_shifts = shifts[:head] + [0, tail_shift]
+        new_starts.extend(position + index_delta for position in starts[tail:])
+        new_shifts.extend(shift + line_delta for shift in shifts[tail:])
+
+        # Drop the entries that an entry at the same index overrides, or
+        # that do not change the shift
+        self.shift_starts, self.shifts = [], []
+        previous = 0
+        for position, (index, shift) in enumerate(zip(new_starts, new_shifts)):
+            if position + 1 < len(new_starts) and new_starts[position + 1] == index:
+                continue
+            if shift != previous:
+                self.shift_starts.append(index)
+                self.shifts.append(shift)
+                previous = shift
+
+        self.tokens[start:end] = tokens
+        if len(self.shift_starts) > self.MAX_SHIFTS:
+            self.apply_shifts()
+
+    def apply_shifts(self):
+        """Rewrites the shifted tokens with their final lines."""
+        tokens = self.tokens
+        ends = self.shift_starts[1:] + [len(tokens)]
+        for start, end, shift in zip(self.shift_starts, ends, self.shifts):
+            if not shift:
+                continue
+            for index in range(start, end):
+                token = tokens[index]
+                tokens[index] = Token(token.type, token.literal, token.line + shift, token.column)
+
+        self.shift_starts = []
+        self.shifts = []
+
+
 # Lexer class
 # Lazily pulls a token from a stream.
 class Lexer:
-    def __init__(self, source: str):
+    # Smallest piece of source worth sending to a worker process
+    PARALLEL_CHUNK_SIZE = 1 << 20
+
+    def __init__(self, source: Union[str, bytes, Iterable[str]], buffered: bool = False, workers: int = 1):
+        """
+        `source` is either the whole program text (a str, or UTF-8 bytes or
+        mmap), which is tokenized right away, or a file-like object / iterable
+        of lines, which is only read as tokens are pulled from `iter_tokens`.
+
+        The tokens of a whole program lexed in this process are kept in a
+        `TokenList`, which `relex` edits in place. With `buffered`, they are
+        stored in a compact `TokenBuffer` instead. With several `workers`,
+        a large program is lexed in parallel by `tokenize_parallel`.
+        """
         self.source = source
         self.tokens = []
+        self.workers = workers
         # Stack to keep track of indentation levels
         self.indent_stack = [0]
-        self.tokenize()
+        # The indentation stack at the start of each line, kept by `tokenize`
+        # for `relex`. Consecutive lines share the same tuple.
+        self.line_indents: Optional[List[Tuple[int, ...]]] = None
+        if buffered:
+            if not isinstance(source, TEXT_TYPES):
+                raise TypeError("Buffered lexing needs the whole source, not a stream")
+            self.tokens = TokenBuffer(source)
+        if isinstance(source, TEXT_TYPES):
+            self.tokenize()
+
+    @classmethod
+    def from_path(cls, path: str, buffered: bool = False, workers: int = 1) -> "Lexer":
+        """
+        Lexes a UTF-8 source file through a read-only memory map, so the
+        file is never read into a string: only the literals of the emitted
+        tokens are decoded. Columns of such a lexer count bytes, not
+        characters.
+
+        The map stays open, as a buffered lexer reads its literals from it,
+        until `close` is called or a `with` block on the lexer exits.
+        """
+        with open(path, "rb") as file:
+            try:
+                source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                source = b""
+
+        return cls(source, buffered, workers)
+
+    def close(self):
+        """Closes the memory map of a lexer created by `from_path`."""
+        if isinstance(self.source, mmap.mmap):
+            self.source.close()
+
+    def __enter__(self) -> "Lexer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def tokenize(self):
-        lines = self.source.split("\n")
-        for line_num, line in enumerate(lines, start=1):
-            column = 1
-            indent_level = len(line) - len(line.lstrip())
-            indent_string = line[:indent_level]
+        if self.workers > 1 and len(self.source) >= 2 * self.PARALLEL_CHUNK_SIZE:
+            self.tokenize_parallel()
+        elif isinstance(self.tokens, TokenBuffer):
+            self.tokenize_buffer()
+        else:
+            self.line_indents = []
+            self.tokens = TokenList(list(self.iter_tokens(self.line_indents)))
+
+    def tokenize_buffer(self):
+        self.indent_stack = [0]
+        line_num, end = self.scan(self.tokens)
+
+        for _ in range(len(self.indent_stack) - 1):
+            self.tokens.append(DEDENT, end, end, line_num + 1, 1)
+
+        self.tokens.append(EOF, end, end, line_num + 1, 1)
+
+    def scan(
+        self, buffer: TokenBuffer, offset: int = 0, first_line: int = 1, line_indents: Optional[List[Tuple[int, ...]]] = None
+    ) -> Tuple[int, int]:
+        """
+        Appends the tokens of the source to `buffer`, without the DEDENT and
+        EOF tokens closing it, shifting offsets by `offset` and numbering
+        lines from `first_line`. Returns the last line number and the end
+        offset of the last token.
+
+        When given `line_indents`, the indentation stack at the start of every
+        line is appended to it, as by `iter_tokens`.
+        """
+        append = buffer.append
+        line_num = first_line - 1
+        end = 0
+        indents = (0,)
+
+        for text, line_num, line_start, line_end in self.iter_lines():
+            if line_indents is not None:
+                indents = self.snapshot_indents(indents)
+                line_indents.append(indents)
+            line_num += first_line - 1
+            for token_type, start, end in self.tokenize_line(text, line_start, line_end):
+                append(token_type, start + offset, end + offset, line_num, start - line_start + 1)
+
+        return line_num, end + offset
+
+    def split_top_level(self, chunk_count: int) -> List[Tuple[int, int]]:
+        """
+        Splits the source into about `chunk_count` `(start, end)` spans that
+        each begin on a line with no indentation, where the indentation stack
+        is back to [0]. Every span but the last ends with a newline.
+        """
+        source = self.source
+        pattern = TOP_LEVEL_PATTERN if isinstance(source, str) else BYTES_TOP_LEVEL_PATTERN
+        size = max(len(source) // chunk_count, self.PARALLEL_CHUNK_SIZE)
+        spans = []
+        start = 0
+
+        while len(source) - start > size:
+            match = pattern.search(source, start + size)
+            if match is None:
+                break
+            spans.append((start, match.end()))
+            start = match.end()
+
+        spans.append((start, len(source)))
+        return spans
+
+    def tokenize_parallel(self):
+        """
+        Lexes the source in chunks split at unindented lines (see
+        `split_top_level`) on a pool of `workers` processes, then joins the
+        token streams in order.
 
-            if indent_level == self.indent_stack[-1]:
-                column += len(indent_string)
+        An unindented line empties the indentation stack, so chunks lex
+        independently: each worker starts with a fresh stack and line numbers
+        shifted to its chunk. As a chunk ends with a newline, its worker
+        finishes on the empty line that is the next chunk's first line, which
+        is where it emits the DEDENTs closing the chunk's open blocks, at
+        column 1 as they would be in a single pass. That line's indentation
+        stack, kept for `relex` in token list mode, is the one the worker
+        saw, not the fresh stack the next worker starts with.
 
-            while indent_level < self.indent_stack[-1]:
-                self.tokens.append(Token(DEDENT, "", line_num, column))
-                self.indent_stack.pop()
+        Chunks are only copied out of the source as they are submitted, with
+        at most two per worker in flight, and their tokens are joined as
+        they come back.
+        """
+        source = self.source
+        buffered = isinstance(self.tokens, TokenBuffer)
+        keep_indents = not buffered and isinstance(source, str)
+        buffer = self.tokens if buffered else TokenBuffer(source)
+        line_indents = [] if keep_indents else None
+        line_num = end = 0
+        depth = 0
 
-            if indent_level > self.indent_stack[-1]:
-                self.tokens.append(Token(INDENT, "", line_num, column))
-                self.indent_stack.append(indent_level)
-                column += len(indent_string)
+        def join(result):
+            nonlocal line_num, end, depth
+            types, starts, ends, lines, columns, line_num, chunk_end, depth, chunk_indents = result
+            buffer.types.extend(types)
+            buffer.starts.extend(starts)
+            buffer.ends.extend(ends)
+            buffer.lines.extend(lines)
+            buffer.columns.extend(columns)
+            if ends:
+                end = chunk_end
+            if keep_indents:
+                line_indents.extend(chunk_indents[1:] if line_indents else chunk_indents)
 
-            self.tokenize_line(line, line_num, column)
+        newline = "\n" if isinstance(source, str) else b"\n"
+        pending = deque()
+        first_line = 1
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for start, chunk_end in self.split_top_level(self.workers * 4):
+                if len(pending) >= 2 * self.workers:
+                    join(pending.popleft().result())
+                pending.append(executor.submit(lex_chunk, (source[start:chunk_end], start, first_line, keep_indents)))
+                first_line += source.count(newline, start, chunk_end)
+            while pending:
+                join(pending.popleft().result())
+
+        self.indent_stack = [0] * (depth + 1)
+        for _ in range(depth):
+            buffer.append(DEDENT, end, end, line_num + 1, 1)
+
+        buffer.append(EOF, end, end, line_num + 1, 1)
+
+        if not buffered:
+            self.tokens = TokenList(list(buffer))
+            self.line_indents = line_indents
+
+    def iter_tokens(self, line_indents: Optional[List[Tuple[int, ...]]] = None) -> Iterator[Token]:
+        """
+        Yields the tokens of the source one line at a time. Only the current
+        line and the indentation stack are held, so a streamed source is
+        lexed in memory bounded by its nesting depth rather than its size.
+
+        When given `line_indents`, the indentation stack at the start of every
+        line is appended to it.
+        """
+        self.indent_stack = [0]
+        line_num = 0
+        indents = (0,)
+
+        for text, line_num, line_start, line_end in self.iter_lines():
+            if line_indents is not None:
+                indents = self.snapshot_indents(indents)
+                line_indents.append(indents)
+            encoded = not isinstance(text, str)
+            for token_type, start, end in self.tokenize_line(text, line_start, line_end):
+                literal = text[start:end]
+                if encoded:
+                    literal = literal.decode()
+                yield Token(token_type, literal, line_num, start - line_start + 1)
 
         # Add DEDENT tokens for remaining indent levels
         for _ in range(len(self.indent_stack) - 1):
-            self.tokens.append(Token(DEDENT, "", len(lines) + 1, 1))
+            yield Token(DEDENT, "", line_num + 1, 1)
 
         # Append EOF token at the end
-        self.tokens.append(Token(EOF, "", len(lines) + 1, 1))
-
-    def tokenize_line(self, line: str, line_num: int, column: int):
-        line = line.lstrip()
-        column += len(line) - len(line.lstrip())
-
-        # Define regular expression patterns for token types
-        patterns = [
-            # -----------------------------------------------
-            # Whitespaces
-            (r"^[ \t]+", WHITESPACE),
-            (r"^\n", CR),
-            # -----------------------------------------------
-            # Comments
-            (r"\^#[^\n]*", COMMENT),
-            # -----------------------------------------------
-            # Logical operators
-            # -----------------------------------------------
-            (r"^\&\&", AND),
-            (r"^\|\|", OR),
-            # Comparison operators
-            (r"^\=\=", EQ),
-            (r"^\!\=", NOT_EQ),
-            (r"^\<\=", LT_EQ),
-            (r"^\>\=", GT_EQ),
-            (r"^\<", LT),
-            (r"^\>", GT),
-            # -----------------------------------------------
-            # -----------------------------------------------
-            # Symbols, delimiters
-            (r"^\;", SEMI),
-            (r"^\,", COMMA),
-            (r"^\:", COLON),
-            (r"^\(", LPAREN),
-            (r"^\)", RPAREN),
-            (r"^\{", LBRACE),
-            (r"^\}", RBRACE),
-            (r"^\[", LBRACKET),
-            (r"^\]", RBRACKET),
-            (r"^\!", BANG),
-            # -----------------------------------------------
-            # Identifiers
-            (r"^[a-zA-Z_][a-zA-Z0-9_]*", IDENT),
-            # Assignment operators
-            (r"^\=", ASSIGN),
-            (r"^\+\=", PLUS_ASSIGN),
-            (r"^\-\=", MINUS_ASSIGN),
-            (r"^\*\=", STAR_ASSIGN),
-            (r"^\/\=", SLASH_ASSIGN),
-            # -----------------------------------------------
-            # Math operators
-            (r"^\+", PLUS),
-            (r"^\-", MINUS),
-            (r"^\*", STAR),
-            (r"^\/", SLASH),
-            (r"^\%", PERCENT),
-            # -----------------------------------------------
-            # Literals
-            (r"^\d+\.\d+", FLOAT),
-            (r"^\d+", INT),
-            (r"^\".*?\"", STRING),
-        ]
-
-        while line:
-            matched = False
-            for pattern, token_type in patterns:
-                match = re.match(pattern, line)
-                if match:
-                    lexeme = match.group(0)
-
-                    if token_type == IDENT:
-                        token_type = lookup_ident(lexeme)
-
-                    if token_type is not WHITESPACE:
-                        self.tokens.append(Token(token_type, lexeme, line_num, column))
-
-                    line = line[len(lexeme):]
-                    column += len(lexeme)
-                    matched = True
+        yield Token(EOF, "", line_num + 1, 1)
+
+    def snapshot_indents(self, previous: Tuple[int, ...]) -> Tuple[int, ...]:
+        """
+        The indentation stack as a tuple, reusing `previous` when the stack
+        has not changed. A single line pops some levels and pushes at most
+        one higher than what is left, so the same depth and top mean the
+        same stack.
+        """
+        stack = self.indent_stack
+        if len(stack) == len(previous) and stack[-1] == previous[-1]:
+            return previous
+
+        return tuple(stack)
+
+    def relex(self, edit_start: int, edit_end: int, new_text: str) -> Tuple[int, int, int]:
+        """
+        Updates the source and tokens for `source[edit_start:edit_end]`
+        being replaced by `new_text`. Lexing restarts at the line of the
+        edit from the indentation stack saved for it, and stops at the first
+        line past the edit that starts with the same stack as before: the
+        old tokens from there on are kept, only moved to their new line
+        numbers when the edit adds or removes lines.
+
+        Returns `(start, old_end, new_end)`: the old `tokens[start:old_end]`
+        were replaced by the new `tokens[start:new_end]`.
+
+        Needs a lexer created from a str source with the default token list.
+        """
+        if self.line_indents is None or not isinstance(self.source, str):
+            raise TypeError("Relexing needs a lexer tokenized from a str source into a token list")
+
+        old_source = self.source
+        tokens = self.tokens
+        source = old_source[:edit_start] + new_text + old_source[edit_end:]
+        length = len(source)
+        edit_end_new = edit_start + len(new_text)
+        offset_delta = edit_end_new - edit_end
+        line_delta = new_text.count("\n") - old_source.count("\n", edit_start, edit_end)
+
+        first_line = old_source.count("\n", 0, edit_start) + 1
+        pos = old_source.rfind("\n", 0, edit_start) + 1
+        start = bisect_left(tokens, first_line, key=itemgetter(2))
+        indents = self.line_indents[first_line - 1]
+        self.indent_stack = list(indents)
+
+        new_tokens = []
+        new_indents = []
+        line_num = first_line
+        old_end = None
+
+        while True:
+            # Past the edit, a line starting an old line with the old
+            # indentation stack is lexed exactly as before.
+            old_pos = pos - offset_delta
+            if pos >= edit_end_new and (old_pos == 0 or old_source[old_pos - 1] == "\n"):
+                old_line = line_num - line_delta
+                if old_line <= len(self.line_indents) and self.line_indents[old_line - 1] == tuple(self.indent_stack):
+                    old_end = bisect_left(tokens, old_line, lo=start, key=itemgetter(2))
+                    break
+
+            indents = self.snapshot_indents(indents)
+            new_indents.append(indents)
+
+            line_end = source.find("\n", pos)
+            if line_end == -1:
+                line_end = length
+            for token_type, token_start, token_end in self.tokenize_line(source, pos, line_end):
+                new_tokens.append(Token(token_type, source[token_start:token_end], line_num, token_start - pos + 1))
+
+            if line_end == length:
+                break
+            pos = line_end + 1
+            line_num += 1
+
+        if old_end is None:
+            # Lexed to the end of the source: the closing tokens are new too
+            old_end = len(tokens)
+            for _ in range(len(self.indent_stack) - 1):
+                new_tokens.append(Token(DEDENT, "", line_num + 1, 1))
+            new_tokens.append(Token(EOF, "", line_num + 1, 1))
+            self.line_indents[first_line - 1:] = new_indents
+        else:
+            self.line_indents[first_line - 1:old_line - 1] = new_indents
+
+        tokens.splice(start, old_end, new_tokens, line_delta)
+        new_end = start + len(new_tokens)
+
+        self.source = source
+        return start, old_end, new_end
+
+    def iter_lines(self) -> Iterator[Tuple[Text, int, int, int]]:
+        """
+        Yields `(text, line_num, line_start, line_end)` for every line of the
+        source, where the line is `text[line_start:line_end]`.
+        """
+        source = self.source
+        chunks = (source,) if isinstance(source, TEXT_TYPES) else source
+        line_num = 0
+        chunk = ""
+        # A source ending with a newline (or an empty one) has a last,
+        # empty line that no chunk spells out.
+        ends_with_newline = True
+
+        for chunk in chunks:
+            length = len(chunk)
+
+            # Walk the chunk line by line with a cursor instead of splitting
+            # it, so no copy of the source or of any line is ever made.
+            newline = "\n" if isinstance(chunk, str) else b"\n"
+            pos = 0
+            while True:
+                line_end = chunk.find(newline, pos)
+                if line_end == -1:
+                    line_end = length
+                line_num += 1
+                yield chunk, line_num, pos, line_end
+                pos = line_end + 1
+                if pos >= length:
                     break
 
-            if not matched:
-                self.tokens.append(Token(ILLEGAL, line[0], line_num, column))
-                line = line[1:]
-                column += 1
+            ends_with_newline = chunk[length - 1:length] == newline
+
+        if ends_with_newline:
+            yield chunk, line_num + 1, len(chunk), len(chunk)
+
+    def tokenize_line(self, text: Text, line_start: int, line_end: int) -> Iterator[Tuple[TokenType, int, int]]:
+        """
+        Scans the line spanning `text[line_start:line_end]` and yields the
+        `(token_type, start, end)` offsets of its tokens, preceded by the
+        INDENT/DEDENT tokens its indentation calls for.
+        """
+        if isinstance(text, str):
+            token_pattern, indent_pattern, keyword_types = TOKEN_PATTERN, INDENT_PATTERN, keywords
+        else:
+            token_pattern, indent_pattern, keyword_types = BYTES_TOKEN_PATTERN, BYTES_INDENT_PATTERN, bytes_keywords
+
+        pos = indent_pattern.match(text, line_start, line_end).end()
+        indent_level = pos - line_start
+
+        while indent_level < self.indent_stack[-1]:
+            yield DEDENT, line_start, line_start
+            self.indent_stack.pop()
+
+        if indent_level > self.indent_stack[-1]:
+            yield INDENT, line_start, line_start
+            self.indent_stack.append(indent_level)
+
+        for match in token_pattern.finditer(text, pos, line_end):
+            token_type = token_groups[match.lastgroup]
+
+            if token_type is WHITESPACE:
+                continue
+
+            if token_type is IDENT:
+                token_type = keyword_types.get(match.group(), IDENT)
+
+            yield (token_type, *match.span())
 
     def get_tokens(self) -> List[Token]:
         return self.tokens
+
+
+def lex_chunk(job: Tuple[Text, int, int, bool]):
+    """
+    Worker side of `Lexer.tokenize_parallel`: lexes one chunk of source,
+    given with its offset and first line number in the whole source, and
+    returns the token arrays, the last line number, the end of the last
+    token, the depth of the indentation stack left open and, if asked for,
+    the indentation stack at the start of every line.
+    """
+    text, offset, first_line, keep_indents = job
+    lexer = Lexer((text,))
+    buffer = TokenBuffer(text)
+    line_indents = [] if keep_indents else None
+    line_num, end = lexer.scan(buffer, offset, first_line, line_indents)
+
+    return (
+        buffer.types, buffer.starts, buffer.ends, buffer.lines, buffer.columns,
+        line_num, end, len(lexer.indent_stack) - 1, line_indents,
+    )
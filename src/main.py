@@ -1,10 +1,11 @@
-import json
+import sys
+
 from pygments import highlight
 from pygments.lexers import JsonLexer
 from pygments.formatters import TerminalFormatter
 
 from lexer import Lexer
-from node import NodeEncoder
+from node import NodeWriter
 from token_parser import Parser
 
 source = """
@@ -33,8 +34,13 @@ ast = parser.parse()
 
 # print(str(ast))
 
-ast = json.dumps(ast, cls=NodeEncoder, indent=2)
-print(highlight(ast, JsonLexer(), TerminalFormatter()))
-
 with open("output.eve.json", "w") as file:
-    file.write(ast)
+    NodeWriter(file, indent=2).write(ast)
+
+# Highlighted line by line, so the JSON text is never held whole: with
+# `indent`, every JSON token sits on a single line.
+json_lexer = JsonLexer()
+formatter = TerminalFormatter()
+with open("output.eve.json") as file:
+    for line in file:
+        highlight(line, json_lexer, formatter, sys.stdout)
@@ -1,20 +1,304 @@
 import json
-from typing import List
+import re
+from json.decoder import scanstring
+from typing import Any, Callable, Dict, List, TextIO, Tuple
+
+
+def node_fields(node_class: type) -> Tuple[str, ...]:
+    """
+    Field names of a node class in declaration order: the __slots__ of the
+    class and its bases. Computed once per class.
+    """
+    fields = NODE_FIELDS.get(node_class)
+    if fields is None:
+        fields = NODE_FIELDS[node_class] = tuple(
+            field
+            for klass in reversed(node_class.__mro__)
+            for field in klass.__dict__.get("__slots__", ())
+        )
+
+    return fields
+
+
+NODE_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+# Node class name -> class, filled in as the classes are defined
+NODE_TYPES: Dict[str, type] = {}
 
 
 class NodeEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Node):
             return {
-                "-__type__": obj.__class__.__name__,
-                "-__data__": obj.__dict__,
+                "-__type__": obj.node_class.__name__,
+                "-__data__": {field: getattr(obj, field) for field in node_fields(obj.node_class)},
             }
 
         return super().default(obj)
 
 
+def decode_node(obj: Dict[str, Any]):
+    """
+    `object_hook` turning the objects written by NodeEncoder back into
+    nodes. Other objects, including the "-__data__" dicts themselves, are
+    returned unchanged.
+    """
+    type_name = obj.get("-__type__")
+    if type_name is None:
+        return obj
+
+    node_class = NODE_TYPES.get(type_name)
+    if node_class is None:
+        raise ValueError(f"Unknown node type: {type_name}")
+
+    return node_class(**obj["-__data__"])
+
+
+class NodeDecoder(json.JSONDecoder):
+    def __init__(self, **kwargs):
+        kwargs.setdefault("object_hook", decode_node)
+        super().__init__(**kwargs)
+
+
+class NodeWriter:
+    """
+    Streams the JSON of an AST to a text file, node by node. The output is
+    identical to `json.dumps(ast, cls=NodeEncoder, indent=indent)`, but the
+    document is never held in memory: only a small write buffer and a stack
+    holding one frame per open node or list, as deep as the tree.
+    """
+
+    BUFFER_SIZE = 1 << 16
+
+    def __init__(self, file: TextIO, indent: int = None):
+        self.file = file
+        self.indent = indent
+        self.item_separator = "," if indent is not None else ", "
+        self.newlines = []
+        self.separators = []
+        # Node class -> (type header, field keys), built once per class
+        self.headers = {}
+
+    def newline(self, level: int) -> str:
+        if self.indent is None:
+            return ""
+
+        while len(self.newlines) <= level:
+            self.newlines.append("\n" + " " * (self.indent * len(self.newlines)))
+
+        return self.newlines[level]
+
+    def separator(self, level: int) -> str:
+        while len(self.separators) <= level:
+            self.separators.append(self.item_separator + self.newline(len(self.separators)))
+
+        return self.separators[level]
+
+    def header(self, node_class: type) -> Tuple[str, Tuple[str, ...], List[str]]:
+        header = self.headers.get(node_class)
+        if header is None:
+            fields = node_fields(node_class)
+            header = self.headers[node_class] = (
+                f'"-__type__": {json.dumps(node_class.__name__)}',
+                fields,
+                [f"{json.dumps(field)}: " for field in fields],
+            )
+
+        return header
+
+    def write(self, value):
+        chunks = []
+        size = 0
+        # Pending work, last first. (value, level, None) is encoded at that
+        # nesting level; (node or list, index, level) is an open node or list
+        # that resumes at its index-th field or item.
+        stack = [(value, 0, None)]
+
+        while stack:
+            value, level, index = stack.pop()
+
+            if index is None:
+                if isinstance(value, Node):
+                    type_header, fields, _ = self.header(value.node_class)
+                    inner = self.newline(level + 1)
+                    chunk = "{" + inner + type_header + self.item_separator + inner + '"-__data__": '
+                    if fields:
+                        stack.append((value, level, 0))
+                    else:
+                        chunk += "{}" + self.newline(level) + "}"
+                elif isinstance(value, list):
+                    if value:
+                        chunk = "["
+                        stack.append((value, level, 0))
+                    else:
+                        chunk = "[]"
+                else:
+                    chunk = json.dumps(value)
+            elif isinstance(value, Node):
+                _, fields, keys = self.header(value.node_class)
+                if index < len(fields):
+                    opening = self.separator(level + 2) if index else "{" + self.newline(level + 2)
+                    chunk = opening + keys[index]
+                    stack.append((value, level, index + 1))
+                    stack.append((getattr(value, fields[index]), level + 2, None))
+                else:
+                    chunk = self.newline(level + 1) + "}" + self.newline(level) + "}"
+            elif index < len(value):
+                chunk = self.separator(level + 1) if index else self.newline(level + 1)
+                stack.append((value, level, index + 1))
+                stack.append((value[index], level + 1, None))
+            else:
+                chunk = self.newline(level) + "]"
+
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.BUFFER_SIZE:
+                self.file.write("".join(chunks))
+                chunks.clear()
+                size = 0
+
+        self.file.write("".join(chunks))
+
+
+class NodeReader:
+    """
+    Reads back an AST written by NodeWriter (or NodeEncoder), a chunk of the
+    file at a time. Unlike `json.load(file, cls=NodeDecoder)`, the document
+    is never held in memory as a whole and nesting depth is only bounded by
+    memory, as open nodes are tracked on an explicit stack.
+
+    Only documents made of nodes, lists and scalars are understood: a node
+    header and each `"field":` key are matched as single tokens.
+    """
+
+    CHUNK_SIZE = 1 << 16
+
+    TOKEN = re.compile(r"""
+        [ \t\n\r,]*(?:
+            (?P<node>\{\s*"-__type__":\s*"(?P<type>\w+)",\s*"-__data__":\s*\{)
+          | (?P<field>"(?P<name>\w+)":)
+          | (?P<end>\}\s*\})
+          | (?P<list>\[)
+          | (?P<end_list>\])
+          | (?P<string>"(?:[^"\\]|\\.)*")
+          | (?P<number>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?)
+          | (?P<constant>true|false|null|NaN|-?Infinity)
+        )
+    """, re.VERBOSE)
+
+    CONSTANTS = {
+        "true": True,
+        "false": False,
+        "null": None,
+        "NaN": float("nan"),
+        "Infinity": float("inf"),
+        "-Infinity": float("-inf"),
+    }
+
+    def __init__(self, file: TextIO):
+        self.file = file
+
+    def read(self):
+        file = self.file
+        match_token = self.TOKEN.match
+        buffer = ""
+        pos = 0
+        at_end = False
+        # Open containers, innermost last: lists and NodeFrames
+        stack: List[Any] = []
+        values: List[Any] = []
+
+        while True:
+            match = match_token(buffer, pos)
+            # A token ending near the end of the buffer may continue in the
+            # next chunk ("1" of "1e-5"), so it is only trusted once the next
+            # chunk is in or the file is exhausted.
+            if not at_end and (match is None or match.end() + 2 >= len(buffer)):
+                chunk = file.read(self.CHUNK_SIZE)
+                at_end = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+
+            if match is None:
+                if buffer[pos:].strip(" \t\n\r,"):
+                    raise ValueError(f"Unexpected AST JSON at: {buffer[pos:pos + 40]!r}")
+                break
+
+            pos = match.end()
+            kind = match.lastgroup
+
+            if kind == "node":
+                type_name = match.group("type")
+                node_class = NODE_TYPES.get(type_name)
+                if node_class is None:
+                    raise ValueError(f"Unknown node type: {type_name}")
+                stack.append(NodeFrame(node_class))
+                continue
+            elif kind == "field":
+                if not stack or stack[-1].__class__ is not NodeFrame:
+                    raise ValueError("Field outside of a node in AST JSON")
+                stack[-1].field = match.group("name")
+                continue
+            elif kind == "list":
+                stack.append([])
+                continue
+            elif kind == "end":
+                if not stack or stack[-1].__class__ is not NodeFrame:
+                    raise ValueError("Unbalanced '}' in AST JSON")
+                frame = stack.pop()
+                value = frame.node_class(**frame.fields)
+            elif kind == "end_list":
+                if not stack or stack[-1].__class__ is not list:
+                    raise ValueError("Unbalanced ']' in AST JSON")
+                value = stack.pop()
+            elif kind == "string":
+                value = scanstring(match.group(kind), 1)[0]
+            elif kind == "number":
+                number = match.group(kind)
+                value = float(number) if "." in number or "e" in number or "E" in number else int(number)
+            else:
+                value = self.CONSTANTS[match.group(kind)]
+
+            if not stack:
+                values.append(value)
+            elif stack[-1].__class__ is list:
+                stack[-1].append(value)
+            else:
+                frame = stack[-1]
+                frame.fields[frame.field] = value
+
+        if stack or len(values) != 1:
+            raise ValueError("Truncated or malformed AST JSON")
+
+        return values[0]
+
+
+class NodeFrame:
+    """A node being read by NodeReader, waiting for its fields."""
+
+    __slots__ = ("node_class", "fields", "field")
+
+    def __init__(self, node_class: type):
+        self.node_class = node_class
+        self.fields: Dict[str, Any] = {}
+        self.field = None
+
+
 class Node:
-    pass
+    # Nodes declare their fields as __slots__ rather than carrying a
+    # per-instance __dict__, which dominates the memory of large trees.
+    __slots__ = ()
+
+    # The class a node is serialized and dispatched as: its own class,
+    # unless it stands in for another one like LazyBlockStatement.
+    node_class = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "node_class" not in cls.__dict__:
+            cls.node_class = cls
+            NODE_TYPES[cls.__name__] = cls
 
 
 class Program(Node):
@@ -22,6 +306,8 @@ class Program(Node):
     <program> ::= statements EOF
     """
 
+    __slots__ = ("statements",)
+
     def __init__(self, statements: List["Statement"]):
         self.statements = statements
 
@@ -30,7 +316,7 @@ class Program(Node):
 
 
 class Statement(Node):
-    pass
+    __slots__ = ()
 
 
 class BlockStatement(Statement):
@@ -38,6 +324,8 @@ class BlockStatement(Statement):
     <block_statement> ::= INDENT statements DEDENT
     """
 
+    __slots__ = ("statements",)
+
     def __init__(self, statements: List["Statement"]):
         self.statements = statements
 
@@ -45,11 +333,46 @@ class BlockStatement(Statement):
         return f'BlockStatement({", ".join(str(statement) for statement in self.statements)})'
 
 
+class LazyBlockStatement(BlockStatement):
+    """
+    BlockStatement built in skim mode: `parse_body` parses the statements
+    of the block, which happens on the first access to `statements`.
+    Everywhere else it is a BlockStatement, and serializes as one.
+    """
+
+    __slots__ = ("body", "parse_body")
+
+    node_class = BlockStatement
+
+    def __init__(self, parse_body: Callable[[], List["Statement"]]):
+        self.body = None
+        self.parse_body = parse_body
+
+    @property
+    def statements(self) -> List["Statement"]:
+        if self.body is None:
+            self.body = self.parse_body()
+            self.parse_body = None
+
+        return self.body
+
+    @statements.setter
+    def statements(self, statements: List["Statement"]):
+        self.body = statements
+        self.parse_body = None
+
+    @property
+    def is_parsed(self) -> bool:
+        return self.body is not None
+
+
 class VariableStatement(Statement):
     """
     <variable_statement> ::= LET variable_declaration_list
     """
 
+    __slots__ = ("declarations",)
+
     def __init__(self, declarations: List["VariableDeclaration"]):
         self.declarations = declarations
 
@@ -62,6 +385,8 @@ class VariableDeclaration(Node):
     <variable_declaration> ::= identifier [ ASSIGN assignment_expression ]
     """
 
+    __slots__ = ("identifier", "initializer")
+
     def __init__(self, identifier: "Identifier", initializer: "Expression" = None):
         self.identifier = identifier
         self.initializer = initializer
@@ -78,6 +403,8 @@ class IfStatement(Statement):
     <if_statement> ::= IF expression THEN statement [ ELSE statement ]
     """
 
+    __slots__ = ("condition", "consequent", "alternate")
+
     def __init__(self, condition: "Expression", consequent: "Statement", alternate: "Statement" = None):
         self.condition = condition
         self.consequent = consequent
@@ -95,6 +422,8 @@ class ExpressionStatement(Statement):
     <expression_statement> ::= expression
     """
 
+    __slots__ = ("expression",)
+
     def __init__(self, expression: "Expression"):
         self.expression = expression
 
@@ -103,7 +432,7 @@ class ExpressionStatement(Statement):
 
 
 class Expression(Node):
-    pass
+    __slots__ = ()
 
 
 class AssignmentExpression(Expression):
@@ -111,6 +440,8 @@ class AssignmentExpression(Expression):
     <assignment_expression> ::= <logical_or_expression> [ <assignment_operator> <assignment_expression> ]
     """
 
+    __slots__ = ("operator", "left", "right")
+
     def __init__(self, operator: str, left: "Expression", right: "AssignmentExpression"):
         self.operator = operator
         self.left = left
@@ -128,6 +459,8 @@ class BinaryExpression(Expression):
     <multiplicative_expression> ::= <primary_expression> <multiplicative_operator> <primary_expression>
     """
 
+    __slots__ = ("operator", "left", "right")
+
     def __init__(self, operator: str, left: "Expression", right: "Expression"):
         self.operator = operator
         self.left = left
@@ -143,6 +476,8 @@ class LogicalExpression(Expression):
     <logical_or_expression> ::= <logical_and_expression> OR <logical_and_expression>
     """
 
+    __slots__ = ("operator", "left", "right")
+
     def __init__(self, operator: str, left: "Expression", right: "Expression"):
         self.operator = operator
         self.left = left
@@ -157,6 +492,8 @@ class PrimaryExpression(Expression):
     <primary_expression> ::= <literal> | <grouped_expression> | <left_hand_side_expression>
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -169,6 +506,8 @@ class GroupedExpression(Expression):
     <grouped_expression> ::= LPAREN expression RPAREN
     """
 
+    __slots__ = ("expression",)
+
     def __init__(self, expression: "Expression"):
         self.expression = expression
 
@@ -177,7 +516,7 @@ class GroupedExpression(Expression):
 
 
 class Literal(Expression):
-    pass
+    __slots__ = ()
 
 
 class IntegerLiteral(Literal):
@@ -185,6 +524,8 @@ class IntegerLiteral(Literal):
     <literal> ::= INT
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value: int):
         self.value = value
 
@@ -197,6 +538,8 @@ class FloatLiteral(Literal):
     <literal> ::= FLOAT
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value: float):
         self.value = value
 
@@ -209,6 +552,8 @@ class StringLiteral(Literal):
     <literal> ::= STRING
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value: str):
         self.value = value
 
@@ -216,11 +561,18 @@ class StringLiteral(Literal):
         return f'StringLiteral({str(self.value)})'
 
 
+def string_value(literal: str) -> str:
+    """The value of a string literal, which keeps its quotes in the AST."""
+    return literal[1:-1]
+
+
 class BoolLiteral(Literal):
     """
     <literal> ::= (TRUE | FALSE)
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value: bool):
         self.value = value
 
@@ -233,6 +585,8 @@ class NullLiteral(Literal):
     <literal> ::= NIL
     """
 
+    __slots__ = ()
+
     def __init__(self):
         pass
 
@@ -245,6 +599,8 @@ class Identifier(Expression):
     <left_hand_side_expression> ::= IDENT
     """
 
+    __slots__ = ("name",)
+
     def __init__(self, name: str):
         self.name = name
 
@@ -0,0 +1,162 @@
+"""
+Content-addressed on-disk cache of parsed ASTs.
+
+An entry is keyed on the SHA-256 of a grammar stamp and the source text,
+and holds the AST in the binary format of `binary_ast`. A hit loads the
+AST without lexing or parsing; a changed source, lexer, parser or node
+layout simply misses.
+"""
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+import binary_ast
+from flat_ast import NODE_CLASSES, OPERATORS
+from lexer import INDENT_PATTERN, TOKEN_PATTERN, TOP_LEVEL_PATTERN, Lexer, keywords, token_types
+from node import Program, node_fields
+from token_parser import Parser
+
+# Bump when the parser starts producing different trees for the same source
+PARSER_VERSION = 1
+
+
+def grammar_stamp() -> str:
+    """A hash of everything that decides the tree parsed from a source."""
+    return hashlib.sha256(repr((
+        PARSER_VERSION,
+        binary_ast.VERSION,
+        tuple(token_types),
+        # The bytes patterns are built from the same pattern strings
+        (TOKEN_PATTERN.pattern, INDENT_PATTERN.pattern, TOP_LEVEL_PATTERN.pattern),
+        sorted(keywords.items()),
+        tuple((node_class.__name__, node_fields(node_class)) for node_class in NODE_CLASSES),
+        OPERATORS,
+    )).encode()).hexdigest()
+
+
+GRAMMAR_STAMP = grammar_stamp()
+
+SUFFIX = ".eveast"
+
+
+class ParseCache:
+    """
+    Parses sources through a cache directory bounded to `max_bytes`. Hits
+    refresh the entry's modification time, and the least recently used
+    entries are evicted once the directory grows past the bound.
+
+    Several processes may share a directory: entries are written to a
+    temporary file and renamed into place, and an unreadable entry is
+    treated as a miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(entry.stat().st_size for entry in self.entries())
+
+    def key(self, source: str) -> str:
+        return hashlib.sha256(GRAMMAR_STAMP.encode() + source.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def entries(self):
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.name.endswith(SUFFIX) and entry.is_file()]
+
+    def get(self, source: str) -> Optional[Program]:
+        path = self.path(self.key(source))
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            ast = binary_ast.loads(data)
+        except OSError:
+            return None
+        except ValueError:
+            self.remove(path)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return ast
+
+    def put(self, source: str, ast: Program):
+        data = binary_ast.dumps(ast)
+        path = self.path(self.key(source))
+        try:
+            # Overwriting an entry replaces its bytes
+            replaced_size = os.stat(path).st_size
+        except OSError:
+            replaced_size = 0
+
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary_path, path)
+        except BaseException:
+            self.remove(temporary_path)
+            raise
+
+        self.size += len(data) - replaced_size
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def parse(self, source: str) -> Program:
+        ast = self.get(source)
+        if ast is not None:
+            self.hits += 1
+            return ast
+
+        self.misses += 1
+        ast = Parser(Lexer(source).get_tokens()).parse()
+        self.put(source, ast)
+
+        return ast
+
+    def parse_file(self, path: str) -> Program:
+        with open(path, encoding="utf-8") as file:
+            return self.parse(file.read())
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache is back
+        under `max_bytes`. The directory is rescanned, as other processes
+        may have added or removed entries.
+        """
+        stats = []
+        for entry in self.entries():
+            try:
+                stats.append((entry.stat(), entry.path))
+            except FileNotFoundError:
+                pass
+
+        stats.sort(key=lambda item: item[0].st_mtime_ns)
+        self.size = sum(stat.st_size for stat, _ in stats)
+
+        for stat, path in stats:
+            if self.size <= self.max_bytes:
+                break
+            self.remove(path)
+            self.size -= stat.st_size
+
+    def clear(self):
+        for entry in self.entries():
+            self.remove(entry.path)
+        self.size = 0
+
+    @staticmethod
+    def remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,285 @@
+"""
+Translation of programs to Python functions.
+
+A Program becomes the Python function
+
+    def program(inputs):
+        v_level = inputs.get("level")
+        ...
+        return {"level": v_level, ...}
+
+built as an `ast.Module` and compiled once by `compile()`, so CPython runs
+the rules itself. Every variable is a local of the function, prefixed with
+`v_` so that no name clashes with a Python keyword. The semantics are those
+of `evaluator`: Python operators, `and`/`or`, `if`/`else`, and assignments
+used as values becoming assignment expressions (`:=`).
+"""
+import ast
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping
+
+import binary_ast
+from evaluator import COMPOUND_ASSIGNMENT_OPERATORS
+from node import (
+    AssignmentExpression,
+    BinaryExpression,
+    BlockStatement,
+    BoolLiteral,
+    ExpressionStatement,
+    FloatLiteral,
+    GroupedExpression,
+    Identifier,
+    IfStatement,
+    IntegerLiteral,
+    LogicalExpression,
+    Node,
+    NullLiteral,
+    PrimaryExpression,
+    Program,
+    StringLiteral,
+    VariableStatement,
+    string_value,
+)
+
+Function = Callable[[Mapping[str, Any]], Dict[str, Any]]
+
+ARITHMETIC_OPERATORS = {
+    "+": ast.Add,
+    "-": ast.Sub,
+    "*": ast.Mult,
+    "/": ast.Div,
+    "%": ast.Mod,
+}
+
+COMPARISON_OPERATORS = {
+    "==": ast.Eq,
+    "!=": ast.NotEq,
+    "<": ast.Lt,
+    "<=": ast.LtE,
+    ">": ast.Gt,
+    ">=": ast.GtE,
+}
+
+FUNCTION_NAME = "program"
+INPUTS_NAME = "inputs"
+
+
+def variable_name(name: str) -> str:
+    return "v_" + name
+
+
+class PythonCompiler:
+    """
+    Builds the `ast.Module` of a Program, dispatching on `node_class`:
+    statements translate to lists of `ast.stmt`, expressions to `ast.expr`.
+    """
+
+    def __init__(self):
+        # Variable names in order of first use
+        self.names: Dict[str, None] = {}
+        self.statement_translators: Dict[type, Callable[[Node], List[ast.stmt]]] = {
+            BlockStatement: self.translate_block,
+            VariableStatement: self.translate_variable_statement,
+            IfStatement: self.translate_if_statement,
+            ExpressionStatement: self.translate_expression_statement,
+        }
+        self.expression_translators: Dict[type, Callable[[Node], ast.expr]] = {
+            AssignmentExpression: self.translate_assignment_expression,
+            BinaryExpression: self.translate_binary_expression,
+            LogicalExpression: self.translate_logical_expression,
+            PrimaryExpression: self.translate_primary_expression,
+            GroupedExpression: self.translate_grouped_expression,
+            IntegerLiteral: self.translate_literal,
+            FloatLiteral: self.translate_literal,
+            StringLiteral: self.translate_string_literal,
+            BoolLiteral: self.translate_literal,
+            NullLiteral: self.translate_null_literal,
+            Identifier: self.translate_identifier,
+        }
+
+    def translate_program(self, program: Program) -> ast.Module:
+        body = []
+        for statement in program.statements:
+            body.extend(self.statement(statement))
+
+        inputs = ast.Name(INPUTS_NAME, ast.Load())
+        prologue = [
+            ast.Assign(
+                [ast.Name(variable_name(name), ast.Store())],
+                ast.Call(ast.Attribute(inputs, "get", ast.Load()), [ast.Constant(name)], []),
+            )
+            for name in self.names
+        ]
+        result = ast.Return(ast.Dict(
+            [ast.Constant(name) for name in self.names],
+            [ast.Name(variable_name(name), ast.Load()) for name in self.names],
+        ))
+
+        function = ast.FunctionDef(
+            name=FUNCTION_NAME,
+            args=ast.arguments(posonlyargs=[], args=[ast.arg(INPUTS_NAME)], kwonlyargs=[], kw_defaults=[], defaults=[]),
+            body=prologue + body + [result],
+            decorator_list=[],
+        )
+
+        return ast.fix_missing_locations(ast.Module([function], type_ignores=[]))
+
+    def statement(self, node: Node) -> List[ast.stmt]:
+        translator = self.statement_translators.get(node.node_class)
+        if translator is None:
+            raise TypeError(f"Cannot translate {node.node_class.__name__}")
+
+        return translator(node)
+
+    def expression(self, node: Node) -> ast.expr:
+        translator = self.expression_translators.get(node.node_class)
+        if translator is None:
+            raise TypeError(f"Cannot translate {node.node_class.__name__}")
+
+        return translator(node)
+
+    def variable(self, name: str, context: ast.expr_context) -> ast.Name:
+        self.names[name] = None
+        return ast.Name(variable_name(name), context)
+
+    def body(self, node: Node) -> List[ast.stmt]:
+        return self.statement(node) or [ast.Pass()]
+
+    def translate_block(self, node: BlockStatement) -> List[ast.stmt]:
+        statements = []
+        for statement in node.statements:
+            statements.extend(self.statement(statement))
+
+        return statements
+
+    def translate_variable_statement(self, node: VariableStatement) -> List[ast.stmt]:
+        statements = []
+        for declaration in node.declarations:
+            target = self.variable(declaration.identifier.name, ast.Store())
+            # Without an initializer, the variable keeps its value
+            if declaration.initializer:
+                statements.append(ast.Assign([target], self.expression(declaration.initializer)))
+
+        return statements
+
+    def translate_if_statement(self, node: IfStatement) -> List[ast.stmt]:
+        alternate = self.body(node.alternate) if node.alternate is not None else []
+        return [ast.If(self.expression(node.condition), self.body(node.consequent), alternate)]
+
+    def translate_expression_statement(self, node: ExpressionStatement) -> List[ast.stmt]:
+        expression = node.expression
+        if expression.node_class is AssignmentExpression:
+            # A plain assignment statement rather than an unused `:=`
+            target, value = self.assignment(expression)
+            return [ast.Assign([target], value)]
+
+        return [ast.Expr(self.expression(expression))]
+
+    def assignment(self, node: AssignmentExpression):
+        target = node.left
+        while target.node_class is GroupedExpression or target.node_class is PrimaryExpression:
+            target = target.expression if target.node_class is GroupedExpression else target.value
+        if target.node_class is not Identifier:
+            raise SyntaxError(f"Invalid left-hand side in assignment expression: {target}")
+
+        variable = self.variable(target.name, ast.Store())
+        value = self.expression(node.right)
+        if node.operator != "=":
+            operator = ARITHMETIC_OPERATORS[COMPOUND_ASSIGNMENT_OPERATORS[node.operator]]
+            value = ast.BinOp(self.variable(target.name, ast.Load()), operator(), value)
+
+        return variable, value
+
+    def translate_assignment_expression(self, node: AssignmentExpression) -> ast.expr:
+        target, value = self.assignment(node)
+        return ast.NamedExpr(target, value)
+
+    def translate_binary_expression(self, node: BinaryExpression) -> ast.expr:
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+
+        if node.operator in COMPARISON_OPERATORS:
+            return ast.Compare(left, [COMPARISON_OPERATORS[node.operator]()], [right])
+
+        return ast.BinOp(left, ARITHMETIC_OPERATORS[node.operator](), right)
+
+    def translate_logical_expression(self, node: LogicalExpression) -> ast.expr:
+        operator = ast.And() if node.operator == "and" else ast.Or()
+        return ast.BoolOp(operator, [self.expression(node.left), self.expression(node.right)])
+
+    def translate_primary_expression(self, node: PrimaryExpression) -> ast.expr:
+        return self.expression(node.value)
+
+    def translate_grouped_expression(self, node: GroupedExpression) -> ast.expr:
+        return self.expression(node.expression)
+
+    def translate_literal(self, node: Node) -> ast.expr:
+        return ast.Constant(node.value)
+
+    def translate_string_literal(self, node: StringLiteral) -> ast.expr:
+        return ast.Constant(string_value(node.value))
+
+    def translate_null_literal(self, node: NullLiteral) -> ast.expr:
+        return ast.Constant(None)
+
+    def translate_identifier(self, node: Identifier) -> ast.expr:
+        return self.variable(node.name, ast.Load())
+
+
+def to_python_module(program: Program) -> ast.Module:
+    return PythonCompiler().translate_program(program)
+
+
+def python_source(program: Program) -> str:
+    return ast.unparse(to_python_module(program))
+
+
+def program_hash(program: Program) -> str:
+    return hashlib.sha256(binary_ast.dumps(program)).hexdigest()
+
+
+class FunctionCache:
+    """
+    Compiled functions keyed by program hash (the SHA-256 of the program's
+    binary AST), keeping the `max_size` most recently used.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.functions: "OrderedDict[str, Function]" = OrderedDict()
+
+    def get(self, program: Program) -> Function:
+        key = program_hash(program)
+        function = self.functions.get(key)
+        if function is not None:
+            self.functions.move_to_end(key)
+            return function
+
+        function = self.functions[key] = compile_function(program)
+        if len(self.functions) > self.max_size:
+            self.functions.popitem(last=False)
+
+        return function
+
+
+def compile_function(program: Program) -> Function:
+    """Compiles `program`, without caching, to a function of its inputs."""
+    code = compile(to_python_module(program), "<eevee>", "exec")
+    namespace: Dict[str, Any] = {}
+    exec(code, namespace)
+
+    return namespace[FUNCTION_NAME]
+
+
+FUNCTIONS = FunctionCache()
+
+
+def compile_to_python(program: Program) -> Function:
+    """
+    The compiled function of `program`, from the module cache when the
+    same program was compiled before. Calling it with a mapping of input
+    variables (missing ones are nil) runs the program and returns every
+    variable by name.
+    """
+    return FUNCTIONS.get(program)
@@ -1,4 +1,7 @@
-from typing import Callable, List
+from bisect import bisect_left
+from collections.abc import Sequence
+from operator import itemgetter
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from node import (
     AssignmentExpression,
@@ -12,6 +15,7 @@ from node import (
     Identifier,
     IfStatement,
     IntegerLiteral,
+    LazyBlockStatement,
     Literal,
     LogicalExpression,
     Node,
@@ -23,6 +27,7 @@ from node import (
     VariableStatement,
     VariableDeclaration,
 )
+from flat_ast import FlatBuilder
 from lexer import (
     Token,
     TokenType,
@@ -64,21 +69,213 @@ from lexer import (
 )
 
 
+# Operator precedence levels, from loosest to tightest binding
+ASSIGNMENT = 1
+LOGICAL_OR = 2
+LOGICAL_AND = 3
+EQUALITY = 4
+RELATIONAL = 5
+ADDITIVE = 6
+MULTIPLICATIVE = 7
+
+# Token type id -> precedence of the operator. Tokens that are not
+# operators are absent and bind looser than any level.
+OPERATOR_PRECEDENCE = {
+    ASSIGN.id: ASSIGNMENT,
+    PLUS_ASSIGN.id: ASSIGNMENT,
+    MINUS_ASSIGN.id: ASSIGNMENT,
+    STAR_ASSIGN.id: ASSIGNMENT,
+    SLASH_ASSIGN.id: ASSIGNMENT,
+    OR.id: LOGICAL_OR,
+    AND.id: LOGICAL_AND,
+    EQ.id: EQUALITY,
+    NOT_EQ.id: EQUALITY,
+    LT.id: RELATIONAL,
+    LT_EQ.id: RELATIONAL,
+    GT.id: RELATIONAL,
+    GT_EQ.id: RELATIONAL,
+    PLUS.id: ADDITIVE,
+    MINUS.id: ADDITIVE,
+    STAR.id: MULTIPLICATIVE,
+    SLASH.id: MULTIPLICATIVE,
+    PERCENT.id: MULTIPLICATIVE,
+}
+
+# Token type id -> operator string stored in the AST. Keyword spellings are
+# normalized: `is`/`not` become `==`/`!=`, `&&`/`||` become `and`/`or`.
+OPERATOR_STRINGS = {
+    OR.id: "or",
+    AND.id: "and",
+    EQ.id: "==",
+    NOT_EQ.id: "!=",
+    LT.id: "<",
+    LT_EQ.id: "<=",
+    GT.id: ">",
+    GT_EQ.id: ">=",
+    PLUS.id: "+",
+    MINUS.id: "-",
+    STAR.id: "*",
+    SLASH.id: "/",
+    PERCENT.id: "%",
+}
+
+LITERAL_TYPES = frozenset(token_type.id for token_type in (
+    INT, FLOAT, STRING, TRUE, FALSE, NIL
+))
+
+
+class TreeBuilder:
+    """
+    Builds the AST out of the `node.py` classes. The parser creates every
+    node through its builder, so that another builder (`FlatBuilder`) can
+    lay the same tree out differently.
+    """
+
+    Program = Program
+    BlockStatement = BlockStatement
+    LazyBlockStatement = LazyBlockStatement
+    VariableStatement = VariableStatement
+    VariableDeclaration = VariableDeclaration
+    IfStatement = IfStatement
+    ExpressionStatement = ExpressionStatement
+    AssignmentExpression = AssignmentExpression
+    BinaryExpression = BinaryExpression
+    LogicalExpression = LogicalExpression
+    IntegerLiteral = IntegerLiteral
+    FloatLiteral = FloatLiteral
+    StringLiteral = StringLiteral
+    BoolLiteral = BoolLiteral
+    NullLiteral = NullLiteral
+    Identifier = Identifier
+
+    @staticmethod
+    def is_identifier(node: Node) -> bool:
+        return isinstance(node, Identifier)
+
+
 class Parser:
-    def __init__(self, tokens: List[Token]):
-        self.current_token_idx = 0
+    def __init__(self, tokens: Iterable[Token], flat: bool = False, skim: bool = False):
+        """
+        `tokens` can be a list or any iterable, such as `Lexer.iter_tokens()`.
+        The grammar needs a single token of lookahead, so tokens are pulled
+        one at a time and never buffered beyond `current_token`.
+
+        With `flat`, `parse` builds a `FlatAST` instead of `node.py` objects.
+        With `skim`, the tokens of indented blocks are only collected, and
+        parsed into statements when a consumer first reads them (see
+        `LazyBlockStatement`). Syntax errors inside a block are then raised
+        by that first access.
+        """
+        if flat and skim:
+            raise ValueError("Skim mode builds node.py trees, not a FlatAST")
+
+        self.builder = FlatBuilder(self) if flat else TreeBuilder()
+        self.skim = skim
+        # Token index span [start, end) of each top-level statement, for `reparse`
+        self.statement_spans: Optional[List[Tuple[int, int]]] = None
+        self.current_token_idx = -1
         self.tokens = tokens
-        self.current_token = self.tokens[self.current_token_idx]
+        self.token_stream = iter(tokens)
+        self.current_token = None
+        self.current_type = None
+        self.advance()
 
     def parse(self):
-        if len(self.tokens) == 0:
+        if self.current_token is None:
             return
         return self.parse_program()
 
     def parse_program(self) -> Program:
-        statements = self.parse_statements(EOF)
+        statements = list(self.iter_statements())
+
+        return self.builder.Program(statements)
+
+    def iter_statements(self) -> Iterator[Statement]:
+        """
+        Yields each top-level statement as soon as it is parsed. Fed by a
+        lazy token stream such as `Lexer.iter_tokens()`, the source is only
+        read up to the token after the statement, so consumers can start on
+        the first statements of a large file while the rest is unread.
+
+        Statement spans, for `reparse`, are only recorded when the tokens
+        are a sequence: a stream cannot be parsed again.
+        """
+        if self.current_token is None:
+            return
+
+        spans = [] if isinstance(self.tokens, Sequence) else None
+
+        while not self.match(EOF):
+            start = self.current_token_idx
+            statement = self.parse_statement()
+            if spans is not None:
+                spans.append((start, self.current_token_idx))
+            yield statement
+
+        self.statement_spans = spans
+
+    def reparse(self, program: Program, start: int, old_end: int, new_end: int) -> Program:
+        """
+        Parses the token list again after `tokens[start:old_end]` were
+        replaced by what is now `tokens[start:new_end]`, as reported by
+        `Lexer.relex`, reusing the top-level statements of `program` that
+        the edit cannot have changed.
+
+        A statement is kept if it ended before the first changed token: the
+        token that ended it is unchanged too. Parsing resumes with the first
+        statement that is not, and stops as soon as it reaches, past the
+        edit, the start of an old statement, which is reused from there on.
+        A flat parser parses the whole token list into a new FlatAST.
+        """
+        spans = self.statement_spans
+        if not isinstance(self.builder, TreeBuilder):
+            # A FlatAST only grows, and cannot share nodes with the old one:
+            # parse everything into a new one
+            self.builder = FlatBuilder(self)
+            spans = None
+        if spans is None:
+            self.restart(0)
+            return self.parse_program()
+
+        delta = new_end - old_end
+        head = bisect_left(spans, start, key=itemgetter(1))
+        tail = bisect_left(spans, old_end, key=itemgetter(0))
+        self.restart(spans[head - 1][1] if head else 0)
+
+        statements = program.statements[:head]
+        new_spans = spans[:head]
+        # Cleared while tokens and spans disagree, so that a SyntaxError
+        # leaves the next `reparse` to parse everything
+        self.statement_spans = None
+
+        while not self.match(EOF):
+            position = self.current_token_idx
+            if position >= new_end:
+                while tail < len(spans) and spans[tail][0] < position - delta:
+                    tail += 1
+                if tail < len(spans) and spans[tail][0] == position - delta:
+                    break
+
+            statements.append(self.parse_statement())
+            new_spans.append((position, self.current_token_idx))
+        else:
+            tail = len(spans)
 
-        return Program(statements)
+        statements.extend(program.statements[tail:])
+        if delta:
+            new_spans.extend((span_start + delta, span_end + delta) for span_start, span_end in spans[tail:])
+        else:
+            new_spans.extend(spans[tail:])
+
+        self.statement_spans = new_spans
+        return self.builder.Program(statements)
+
+    def restart(self, index: int):
+        """Moves the parser to `tokens[index]`, which must be a sequence."""
+        tokens = self.tokens
+        self.token_stream = (tokens[position] for position in range(index, len(tokens)))
+        self.current_token_idx = index - 1
+        self.advance()
 
     def parse_statements(self, stop_token_type: TokenType) -> List[Statement]:
         statements = []
@@ -99,6 +296,12 @@ class Parser:
         return self.parse_expression_statement()
 
     def parse_block_statement(self) -> BlockStatement:
+        if self.skim:
+            return self.skim_block_statement()
+
+        return self.builder.BlockStatement(self.parse_block_body())
+
+    def parse_block_body(self) -> List[Statement]:
         statements = []
         self.eat(INDENT)
 
@@ -109,14 +312,49 @@ class Parser:
 
         self.eat(DEDENT)
 
-        return BlockStatement(statements)
+        return statements
+
+    def skim_block_statement(self) -> LazyBlockStatement:
+        """
+        Collects the tokens from the current INDENT to its matching DEDENT
+        without parsing them, into a block that a parser of the same class
+        parses (in skim mode again) on first access.
+        """
+        tokens = [self.current_token]
+        indent, dedent = INDENT.id, DEDENT.id
+        depth = 1
+
+        # Pull straight from the stream: no parser state is needed per token
+        for token in self.token_stream:
+            tokens.append(token)
+            type_id = token.type.id
+            if type_id == indent:
+                depth += 1
+            elif type_id == dedent:
+                depth -= 1
+                if depth == 0:
+                    break
+
+        if depth:
+            token = tokens[-1]
+            raise SyntaxError(f"[{token.line}:{token.column}] Expected {DEDENT}, but got {token.type}")
+
+        self.current_token_idx += len(tokens) - 1
+        self.advance()
+
+        parser_class = self.__class__
+
+        def parse_body() -> List[Statement]:
+            return parser_class(tokens, skim=True).parse_block_body()
+
+        return self.builder.LazyBlockStatement(parse_body)
 
     def parse_variable_statement(self) -> VariableStatement:
         self.eat(LET)
 
         declarations = self.parse_variable_declaration_list()
 
-        return VariableStatement(declarations)
+        return self.builder.VariableStatement(declarations)
 
     def parse_variable_declaration_list(self) -> List[VariableDeclaration]:
         declarations = [self.parse_variable_declaration()]
@@ -133,7 +371,7 @@ class Parser:
         if not self.match(COMMA) and self.match(ASSIGN):
             initializer = self.parse_variable_initializer()
 
-        return VariableDeclaration(identifier, initializer)
+        return self.builder.VariableDeclaration(identifier, initializer)
 
     def parse_variable_initializer(self) -> AssignmentExpression:
         self.eat(ASSIGN)
@@ -150,11 +388,11 @@ class Parser:
         else:
             alternate = None
 
-        return IfStatement(condition, consequent, alternate)
+        return self.builder.IfStatement(condition, consequent, alternate)
 
     def parse_expression_statement(self) -> ExpressionStatement:
         expression = self.parse_expression()
-        return ExpressionStatement(expression)
+        return self.builder.ExpressionStatement(expression)
 
     def parse_expression(self) -> Expression:
         return self.parse_assignment_expression()
@@ -166,64 +404,39 @@ class Parser:
 
         return expression
 
-    def parse_assignment_expression(self) -> AssignmentExpression:
-        left = self.parse_logical_or_expression()
-
-        if not self.is_assignment_operator(self.current_token.type):
-            return left
-
-        return AssignmentExpression(
-            self.parse_assignment_operator().literal,
-            self.check_valid_assignment_target(left),
-            self.parse_assignment_expression()
-        )
-
-    def parse_logical_or_expression(self) -> LogicalExpression:
-        return self.parse_logical_expression(self.parse_logical_and_expression, OR)
-
-    def parse_logical_and_expression(self) -> LogicalExpression:
-        return self.parse_logical_expression(self.parse_equality_expression, AND)
-
-    def parse_logical_expression(self, builder: Callable[[], LogicalExpression], op: TokenType) -> LogicalExpression:
-        left = builder()
-
-        if self.match(op):
-            operator_string = self.eat(op).literal
-            if operator_string == "&&":
-                operator_string = "and"
-            if operator_string == "||":
-                operator_string = "or"
-            right = builder()
-            left = LogicalExpression(operator_string, left, right)
-
-        return left
-
-    def parse_equality_expression(self) -> BinaryExpression:
-        return self.parse_binary_expression(self.parse_relational_expression, EQ, NOT_EQ)
-
-    def parse_relational_expression(self) -> BinaryExpression:
-        return self.parse_binary_expression(self.parse_additive_expression, LT, LT_EQ, GT, GT_EQ)
-
-    def parse_additive_expression(self) -> BinaryExpression:
-        return self.parse_binary_expression(self.parse_multiplicative_expression, PLUS, MINUS)
-
-    def parse_multiplicative_expression(self) -> BinaryExpression:
-        return self.parse_binary_expression(self.parse_primary_expression, STAR, SLASH, PERCENT)
-
-    def parse_binary_expression(self, builder: Callable[[], BinaryExpression], *ops: TokenType) -> BinaryExpression:
-        left = builder()
-
-        for op in ops:
-            if self.match(op):
-                operator_string = self.eat(op).literal
-                if operator_string == "is":
-                    operator_string = "=="
-                if operator_string == "not":
-                    operator_string = "!="
-                right = builder()
-                left = BinaryExpression(operator_string, left, right)
+    def parse_assignment_expression(self) -> Expression:
+        return self.parse_operator_expression(ASSIGNMENT)
+
+    def parse_operator_expression(self, min_precedence: int) -> Expression:
+        """
+        Parses a primary expression, then folds in every following operator
+        that binds at least as tightly as `min_precedence`, looking levels up
+        in OPERATOR_PRECEDENCE (precedence climbing). Binary operators are
+        left-associative, assignment operators right-associative.
+        """
+        left = self.parse_primary_expression()
+
+        while True:
+            precedence = OPERATOR_PRECEDENCE.get(self.current_type, 0)
+            if precedence < min_precedence:
+                return left
+
+            if precedence == ASSIGNMENT:
+                left = self.builder.AssignmentExpression(
+                    self.parse_assignment_operator().literal,
+                    self.check_valid_assignment_target(left),
+                    self.parse_operator_expression(ASSIGNMENT)
+                )
+                continue
+
+            operator_string = OPERATOR_STRINGS[self.current_type]
+            self.advance()
+            right = self.parse_operator_expression(precedence + 1)
 
-        return left
+            if precedence <= LOGICAL_AND:
+                left = self.builder.LogicalExpression(operator_string, left, right)
+            else:
+                left = self.builder.BinaryExpression(operator_string, left, right)
 
     def parse_left_hand_side_expression(self) -> Expression:
         if self.match(IDENT):
@@ -234,7 +447,9 @@ class Parser:
             )
 
     def parse_primary_expression(self) -> PrimaryExpression:
-        if self.is_literal(self.current_token.type):
+        if self.current_type == IDENT.id:
+            return self.parse_identifier()
+        elif self.current_type in LITERAL_TYPES:
             return self.parse_literal()
         elif self.match(LPAREN):
             return self.parse_grouped_expression()
@@ -261,15 +476,15 @@ class Parser:
 
     def parse_integer_literal(self) -> IntegerLiteral:
         value = self.eat(INT).literal
-        return IntegerLiteral(int(value))
+        return self.builder.IntegerLiteral(int(value))
 
     def parse_float_literal(self) -> FloatLiteral:
         value = self.eat(FLOAT).literal
-        return FloatLiteral(float(value))
+        return self.builder.FloatLiteral(float(value))
 
     def parse_string_literal(self) -> StringLiteral:
         value = self.eat(STRING).literal
-        return StringLiteral(value)
+        return self.builder.StringLiteral(value)
 
     def parse_bool_literal(self, value: bool) -> BoolLiteral:
         if value:
@@ -277,56 +492,36 @@ class Parser:
         else:
             self.eat(FALSE)
 
-        return BoolLiteral(value)
+        return self.builder.BoolLiteral(value)
 
     def parse_null_literal(self) -> NullLiteral:
         self.eat(NIL)
-        return NullLiteral()
+        return self.builder.NullLiteral()
 
     def parse_identifier(self) -> Identifier:
         name = self.eat(IDENT).literal
-        return Identifier(name)
+        return self.builder.Identifier(name)
 
     def parse_assignment_operator(self) -> Token:
-        if self.match(ASSIGN):
-            return self.eat(ASSIGN)
-
-        return self.eat(self.check_complex_assignment_operator())
-
-    def is_assignment_operator(self, token_type: TokenType) -> bool:
-        return token_type == ASSIGN or token_type == self.check_complex_assignment_operator()
-
-    def check_complex_assignment_operator(self) -> TokenType:
-        if self.match(PLUS_ASSIGN):
-            return PLUS_ASSIGN
-        elif self.match(MINUS_ASSIGN):
-            return MINUS_ASSIGN
-        elif self.match(STAR_ASSIGN):
-            return STAR_ASSIGN
-        elif self.match(SLASH_ASSIGN):
-            return SLASH_ASSIGN
+        return self.eat(self.current_token.type)
 
     def check_valid_assignment_target(self, node: Node) -> Node:
-        if isinstance(node, Identifier):
+        if self.builder.is_identifier(node):
             return node
 
         raise SyntaxError(
             f"[{self.current_token.line}:{self.current_token.column}] Invalid left-hand side in assignment expression"
         )
 
-    def is_literal(self, token_type: TokenType) -> bool:
-        return token_type == INT or token_type == FLOAT or token_type == STRING or token_type == TRUE or token_type == FALSE or token_type == NIL
-
     def advance(self):
         self.current_token_idx += 1
-        if self.current_token_idx < len(self.tokens):
-            self.current_token = self.tokens[self.current_token_idx]
-        else:
-            self.current_token = None
+        self.current_token = next(self.token_stream, None)
+        # Integer id of the current token type, for cheap comparisons
+        self.current_type = None if self.current_token is None else self.current_token.type.id
 
     def eat(self, token_type: TokenType) -> Token:
         token = self.current_token
-        if self.match(token_type):
+        if self.current_type == token_type.id:
             self.advance()
         else:
             raise SyntaxError(
@@ -342,7 +537,133 @@ class Parser:
             )
 
     def match(self, token_type: TokenType) -> bool:
-        return self.current_token is not None and self.current_token.type == token_type
+        return self.current_type == token_type.id
 
     def is_at_end(self) -> bool:
-        return self.current_token is None or self.current_token.type == EOF
+        return self.current_type is None or self.current_type == EOF.id
+
+
+class IterativeParser(Parser):
+    """
+    Parser that keeps its own stack of open statements and pending operators
+    instead of recursing, so arbitrarily deep nesting (blocks, `if` chains,
+    parentheses) parses in constant Python stack. Produces the same AST as
+    `Parser`.
+    """
+
+    # Kinds of open statement frames
+    BLOCK = 0
+    CONSEQUENT = 1
+    ALTERNATE = 2
+
+    # Marks an open parenthesis on the operator stack
+    GROUP = (0, None)
+
+    def parse_statement(self) -> Statement:
+        frames = []
+        statement = None
+
+        while True:
+            if statement is None:
+                # A statement starts here, unless the enclosing block ends
+                if frames and frames[-1][0] == self.BLOCK and self.match(DEDENT):
+                    self.eat(DEDENT)
+                    statement = self.builder.BlockStatement(frames.pop()[1])
+                elif self.match(INDENT):
+                    if self.skim:
+                        statement = self.skim_block_statement()
+                    else:
+                        self.eat(INDENT)
+                        frames.append((self.BLOCK, []))
+                elif self.match(IF):
+                    self.eat(IF)
+                    condition = self.parse_expression()
+                    self.eat(THEN)
+                    frames.append((self.CONSEQUENT, condition))
+                elif self.match(LET):
+                    statement = self.parse_variable_statement()
+                else:
+                    statement = self.parse_expression_statement()
+                continue
+
+            # A statement is complete: hand it to the enclosing frame
+            if not frames:
+                return statement
+
+            frame = frames[-1]
+            if frame[0] == self.BLOCK:
+                frame[1].append(statement)
+                statement = None
+            elif frame[0] == self.CONSEQUENT:
+                if self.match(ELSE):
+                    self.eat(ELSE)
+                    frames[-1] = (self.ALTERNATE, frame[1], statement)
+                    statement = None
+                else:
+                    frames.pop()
+                    statement = self.builder.IfStatement(frame[1], statement, None)
+            else:
+                frames.pop()
+                statement = self.builder.IfStatement(frame[1], frame[2], statement)
+
+    def parse_assignment_expression(self) -> Expression:
+        """
+        Shunting-yard over OPERATOR_PRECEDENCE: operands and pending
+        operators live on two stacks, and open parentheses are GROUP marks
+        that stop reductions until their RPAREN.
+        """
+        operands = []
+        operators = []
+        open_groups = 0
+
+        while True:
+            # Operand position: open groups, then a literal or identifier
+            while self.match(LPAREN):
+                self.eat(LPAREN)
+                operators.append(self.GROUP)
+                open_groups += 1
+            operands.append(self.parse_primary_expression())
+
+            # Operator position: close groups, then an operator or the end
+            while True:
+                precedence = OPERATOR_PRECEDENCE.get(self.current_type, 0)
+                if precedence:
+                    break
+
+                if not self.match(RPAREN) or not open_groups:
+                    # End of the expression: every group must be closed
+                    if open_groups:
+                        self.eat(RPAREN)
+                    while operators:
+                        self.reduce(operands, operators)
+                    return operands[0]
+
+                self.eat(RPAREN)
+                while operators[-1] is not self.GROUP:
+                    self.reduce(operands, operators)
+                operators.pop()
+                open_groups -= 1
+
+            # Reduce tighter operators; assignment is right-associative
+            while operators and operators[-1][0] >= precedence and operators[-1][0] != ASSIGNMENT:
+                self.reduce(operands, operators)
+
+            if precedence == ASSIGNMENT:
+                operator_string = self.parse_assignment_operator().literal
+                self.check_valid_assignment_target(operands[-1])
+            else:
+                operator_string = OPERATOR_STRINGS[self.current_type]
+                self.advance()
+            operators.append((precedence, operator_string))
+
+    def reduce(self, operands: List[Expression], operators: List[tuple]):
+        precedence, operator_string = operators.pop()
+        right = operands.pop()
+        left = operands.pop()
+
+        if precedence == ASSIGNMENT:
+            operands.append(self.builder.AssignmentExpression(operator_string, left, right))
+        elif precedence <= LOGICAL_AND:
+            operands.append(self.builder.LogicalExpression(operator_string, left, right))
+        else:
+            operands.append(self.builder.BinaryExpression(operator_string, left, right))
@@ -0,0 +1,372 @@
+"""
+Column-wise evaluation of a program over many records at once.
+
+Every variable is a NumPy array with one value per record, and every
+operation is an array operation over the records it applies to. Where
+conditions differ between records, an `if` runs each branch, and the right
+operand of `and`/`or` is evaluated, on the subset of records that takes it
+only, so records see exactly the short-circuiting (and errors) they would
+under `evaluator`.
+
+Columns keep a native dtype while their values share a kind: numbers
+(ints widening to floats) or strings. A column mixing kinds, holding nil,
+or any operation mixing booleans with arithmetic falls back to object
+arrays with Python semantics. Native integer arithmetic wraps around like
+NumPy's rather than growing, and a division by zero on native columns
+raises FloatingPointError.
+
+NumPy is in requirements.txt, but only this module needs it: the rest of
+the package imports without it.
+"""
+from typing import Any, Callable, Dict, Mapping, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from evaluator import COMPOUND_ASSIGNMENT_OPERATORS
+from node import (
+    AssignmentExpression,
+    BinaryExpression,
+    BlockStatement,
+    BoolLiteral,
+    ExpressionStatement,
+    FloatLiteral,
+    GroupedExpression,
+    Identifier,
+    IfStatement,
+    IntegerLiteral,
+    LogicalExpression,
+    Node,
+    NullLiteral,
+    PrimaryExpression,
+    Program,
+    StringLiteral,
+    VariableStatement,
+    string_value,
+)
+
+# numpy.ndarray, which may not be importable
+Array = Any
+# Indices of the records an operation applies to, or None for all of them
+Rows = Optional[Array]
+
+NUMERIC_KINDS = "iuf"
+STRING_KINDS = "US"
+ARITHMETIC_OPERATORS = {"+", "-", "*", "/", "%"}
+EQUALITY_OPERATORS = {"==", "!="}
+
+if np is not None:
+    UFUNCS = {
+        "==": np.equal,
+        "!=": np.not_equal,
+        "<": np.less,
+        "<=": np.less_equal,
+        ">": np.greater,
+        ">=": np.greater_equal,
+        "+": np.add,
+        "-": np.subtract,
+        "*": np.multiply,
+        "/": np.true_divide,
+        "%": np.remainder,
+    }
+    OBJECT = np.dtype(object)
+
+
+def common_dtype(left, right):
+    """The dtype holding the values of both dtypes without changing them."""
+    if left == right:
+        return left
+    if left.kind in NUMERIC_KINDS and right.kind in NUMERIC_KINDS:
+        return np.result_type(left, right)
+    if left.kind in STRING_KINDS and left.kind == right.kind:
+        return np.result_type(left, right)
+
+    return OBJECT
+
+
+def value_kind(values: Array) -> Optional[str]:
+    """
+    What values of `values` compare equal to: "number" (booleans included),
+    "string" or "nil", or None when unknown (any other object array).
+    """
+    kind = values.dtype.kind
+    if kind == "b" or kind in NUMERIC_KINDS:
+        return "number"
+    if kind in STRING_KINDS:
+        return "string"
+    if values.ndim == 0 and values.item() is None:
+        return "nil"
+
+    return None
+
+
+def truth(values: Array) -> Array:
+    """The Python truthiness of each value, as a boolean array."""
+    kind = values.dtype.kind
+    if kind == "b":
+        return values
+    if kind in NUMERIC_KINDS:
+        return values != 0
+    if kind in STRING_KINDS:
+        return np.char.str_len(values) > 0
+    if values.ndim == 0:
+        # frompyfunc returns a Python bool, not an array, for 0-d input
+        return np.asarray(bool(values.item()))
+
+    return np.frompyfunc(bool, 1, 1)(values).astype(bool)
+
+
+class VectorizedEvaluator:
+    """
+    Compiles a Program once, like `evaluator.Evaluator`, into closures
+    over its compiled children, then runs it over batches of records given
+    as columns. A closure takes the rows it applies to and returns one value
+    per row, or a 0-d array when the value is the same for all of them.
+    """
+
+    def __init__(self, program: Program):
+        if np is None:
+            raise ImportError("VectorizedEvaluator requires numpy")
+
+        # Variable name -> column, for the batch being evaluated
+        self.columns: Dict[str, Array] = {}
+        # Columns that are not input arrays, and may be updated in place
+        self.owned = set()
+        self.size = 0
+        self.compilers: Dict[type, Callable[[Node], Callable[[Rows], Any]]] = {
+            Program: self.compile_block,
+            BlockStatement: self.compile_block,
+            VariableStatement: self.compile_variable_statement,
+            IfStatement: self.compile_if_statement,
+            ExpressionStatement: self.compile_expression_statement,
+            AssignmentExpression: self.compile_assignment_expression,
+            BinaryExpression: self.compile_binary_expression,
+            LogicalExpression: self.compile_logical_expression,
+            PrimaryExpression: self.compile_primary_expression,
+            GroupedExpression: self.compile_grouped_expression,
+            IntegerLiteral: self.compile_literal,
+            FloatLiteral: self.compile_literal,
+            StringLiteral: self.compile_string_literal,
+            BoolLiteral: self.compile_literal,
+            NullLiteral: self.compile_null_literal,
+            Identifier: self.compile_identifier,
+        }
+        # Variable names in order of first use
+        self.names: Dict[str, None] = {}
+        self.run = self.compile(program)
+
+    def evaluate(self, columns: Mapping[str, Any], size: Optional[int] = None) -> Dict[str, Array]:
+        """
+        Runs the program over the records given by `columns`, the values of
+        input variables by name, all of one length. Variables without a
+        column start as nil. `size`, the number of records, is only needed
+        when there are no columns.
+
+        Returns the column of every variable of the program by name. The
+        input arrays are never written to: the columns of inputs the program
+        does not assign are returned as they were given.
+        """
+        arrays = {name: np.asarray(values) for name, values in columns.items()}
+        sizes = {len(array) for array in arrays.values()}
+        if size is not None:
+            sizes.add(size)
+        if len(sizes) != 1:
+            raise ValueError(f"Columns must all have one length, not {sorted(sizes)}")
+        self.size = size = sizes.pop()
+
+        self.columns = {
+            name: arrays[name] if name in arrays else np.full(size, None, dtype=object)
+            for name in self.names
+        }
+        self.owned = set(self.names) - set(arrays)
+        with np.errstate(divide="raise", invalid="raise"):
+            self.run(None)
+
+        return self.columns
+
+    def compile(self, node: Node) -> Callable[[Rows], Any]:
+        compiler = self.compilers.get(node.node_class)
+        if compiler is None:
+            raise TypeError(f"Cannot evaluate {node.node_class.__name__}")
+
+        return compiler(node)
+
+    def count(self, rows: Rows) -> int:
+        return self.size if rows is None else len(rows)
+
+    def store(self, name: str, rows: Rows, values: Array):
+        if rows is None:
+            self.columns[name] = np.array(np.broadcast_to(values, self.size))
+            self.owned.add(name)
+            return
+
+        column = self.columns[name]
+        dtype = common_dtype(column.dtype, values.dtype)
+        if dtype != column.dtype or name not in self.owned:
+            column = self.columns[name] = column.astype(dtype)
+            self.owned.add(name)
+        column[rows] = values
+
+    def compile_block(self, node: Node) -> Callable[[Rows], None]:
+        statements = tuple(self.compile(statement) for statement in node.statements)
+
+        def run_block(rows: Rows):
+            for statement in statements:
+                statement(rows)
+
+        return run_block
+
+    def compile_variable_statement(self, node: VariableStatement) -> Callable[[Rows], None]:
+        declarations = []
+        for declaration in node.declarations:
+            self.names[declaration.identifier.name] = None
+            # Without an initializer, the column keeps its values
+            if declaration.initializer:
+                declarations.append((declaration.identifier.name, self.compile(declaration.initializer)))
+
+        def run_variable_statement(rows: Rows):
+            for name, initializer in declarations:
+                self.store(name, rows, initializer(rows))
+
+        return run_variable_statement
+
+    def compile_if_statement(self, node: IfStatement) -> Callable[[Rows], None]:
+        condition = self.compile(node.condition)
+        consequent = self.compile(node.consequent)
+        alternate = self.compile(node.alternate) if node.alternate is not None else None
+
+        def run_if(rows: Rows):
+            mask = truth(condition(rows))
+            if mask.ndim == 0:
+                if mask:
+                    consequent(rows)
+                elif alternate:
+                    alternate(rows)
+                return
+
+            if mask.any():
+                consequent(subset(rows, mask))
+            if alternate and not mask.all():
+                alternate(subset(rows, ~mask))
+
+        return run_if
+
+    def compile_expression_statement(self, node: ExpressionStatement) -> Callable[[Rows], Any]:
+        return self.compile(node.expression)
+
+    def compile_assignment_expression(self, node: AssignmentExpression) -> Callable[[Rows], Array]:
+        target = node.left
+        while target.node_class is GroupedExpression or target.node_class is PrimaryExpression:
+            target = target.expression if target.node_class is GroupedExpression else target.value
+        if target.node_class is not Identifier:
+            raise SyntaxError(f"Invalid left-hand side in assignment expression: {target}")
+
+        name = target.name
+        self.names[name] = None
+        right = self.compile(node.right)
+
+        if node.operator == "=":
+            def run_assignment(rows: Rows) -> Array:
+                values = right(rows)
+                self.store(name, rows, values)
+                return values
+        else:
+            operator = COMPOUND_ASSIGNMENT_OPERATORS[node.operator]
+
+            def run_assignment(rows: Rows) -> Array:
+                values = apply(operator, read(self.columns[name], rows), right(rows))
+                self.store(name, rows, values)
+                return values
+
+        return run_assignment
+
+    def compile_binary_expression(self, node: BinaryExpression) -> Callable[[Rows], Array]:
+        operator = node.operator
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+
+        return lambda rows: apply(operator, left(rows), right(rows))
+
+    def compile_logical_expression(self, node: LogicalExpression) -> Callable[[Rows], Array]:
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        is_and = node.operator == "and"
+
+        def run_logical(rows: Rows) -> Array:
+            values = left(rows)
+            # Rows whose result is the right operand
+            mask = truth(values)
+            if not is_and:
+                mask = ~mask
+            if mask.ndim == 0:
+                return right(rows) if mask else values
+            if not mask.any():
+                return values
+            if mask.all():
+                return right(rows)
+
+            right_values = right(subset(rows, mask))
+            dtype = common_dtype(values.dtype, right_values.dtype)
+            result = np.broadcast_to(values, self.count(rows)).astype(dtype)
+            result[mask] = right_values
+            return result
+
+        return run_logical
+
+    def compile_primary_expression(self, node: PrimaryExpression) -> Callable[[Rows], Array]:
+        return self.compile(node.value)
+
+    def compile_grouped_expression(self, node: GroupedExpression) -> Callable[[Rows], Array]:
+        return self.compile(node.expression)
+
+    def compile_literal(self, node: Node) -> Callable[[Rows], Array]:
+        value = np.asarray(node.value)
+        return lambda rows: value
+
+    def compile_string_literal(self, node: StringLiteral) -> Callable[[Rows], Array]:
+        value = np.asarray(string_value(node.value))
+        return lambda rows: value
+
+    def compile_null_literal(self, node: NullLiteral) -> Callable[[Rows], Array]:
+        value = np.asarray(None, dtype=object)
+        return lambda rows: value
+
+    def compile_identifier(self, node: Identifier) -> Callable[[Rows], Array]:
+        name = node.name
+        self.names[name] = None
+
+        return lambda rows: read(self.columns[name], rows)
+
+
+def read(column: Array, rows: Rows) -> Array:
+    return column if rows is None else column[rows]
+
+
+def subset(rows: Rows, mask: Array) -> Array:
+    """The rows among `rows` selected by `mask`."""
+    return np.flatnonzero(mask) if rows is None else rows[mask]
+
+
+def apply(operator: str, left: Array, right: Array) -> Array:
+    if operator in EQUALITY_OPERATORS:
+        left_kind = value_kind(left)
+        right_kind = value_kind(right)
+        if left_kind and right_kind and left_kind != right_kind:
+            # e.g. a string column against nil, without going through objects
+            return np.asarray(operator == "!=")
+
+    dtype = common_dtype(left.dtype, right.dtype)
+    if dtype == OBJECT or (operator in ARITHMETIC_OPERATORS and dtype.kind == "b"):
+        # Python semantics, value by value
+        left = left.astype(object)
+        right = right.astype(object)
+
+    # Scalars, for 0-d operands, back to arrays
+    return np.asarray(UFUNCS[operator](left, right))
+
+
+def evaluate_columns(program: Program, columns: Mapping[str, Any], size: Optional[int] = None) -> Dict[str, Array]:
+    """Runs `program` over the records of `columns`, see VectorizedEvaluator.evaluate."""
+    return VectorizedEvaluator(program).evaluate(columns, size)
@@ -0,0 +1,65 @@
+from src.lexer import Lexer
+from src.token_parser import Parser
+
+# The rules of main.py without its declarations, reading `level`,
+# `evo_cond` and `eevee`
+RULES = (
+    "if (level > 16 is true) then\n"
+    "    pokemon = \"ivysaur\"\n"
+    "else\n"
+    "    pokemon = \"bulbasaur\"\n"
+    "if eevee != nil and evo_cond not nil then\n"
+    "    if evo_cond == \"solar_stone\" then\n"
+    "        eevee = \"leafeon\"\n"
+    "    if evo_cond == \"friendship_with_exchange\" then eevee = \"sylveon\"\n"
+    "    if evo_cond == \"friendship_at_night\" then eevee = \"umbreon\" else eevee = \"espeon\"\n"
+    "else eevee = \"missingno\"\n"
+)
+
+# Arithmetic, compound assignments and short-circuiting
+EXPRESSIONS = (
+    "let a = 1 + 2 * 3, b = (1 + 2) * 3, c = 7 / 2, d = 7 % 4, e = 2.5 - 1\n"
+    "a += 1\n"
+    "b -= a\n"
+    "c *= 2\n"
+    "d /= 2\n"
+    "f = g = \"pika\" + \"chu\"\n"
+    "let h = false and (i = 1), j = true or (k = 1)\n"
+    "l = nil or 0 or \"default\"\n"
+    "m = 1 and 2\n"
+)
+
+# The source of main.py, as is
+MAIN_SOURCE = (
+    "\n"
+    "let pokemon\n"
+    "let level\n"
+    "let evo_cond\n"
+    "\n"
+    "if (level > 16 is true) then\n"
+    "    pokemon = \"ivysaur\"\n"
+    "else\n"
+    "    pokemon = \"bulbasaur\"\n"
+    "\n"
+    "if eevee != nil and evo_cond not nil then\n"
+    "    if evo_cond == \"solar_stone\" then\n"
+    "        eevee = \"leafeon\"\n"
+    "    if evo_cond == \"friendship_with_exchange\" then eevee = \"sylveon\"\n"
+    "    if evo_cond == \"friendship_at_night\" then eevee = \"umbreon\" else eevee = \"espeon\"\n"
+    "else eevee = \"missingno\"\n"
+)
+
+# Records to run main.py over
+MAIN_INPUTS = [
+    {"level": 20, "evo_cond": "solar_stone", "eevee": "eevee"},
+    {"level": 5, "evo_cond": None, "eevee": "eevee"},
+    {"level": 17, "evo_cond": "friendship_at_night", "eevee": "eevee"},
+    {"level": 16, "evo_cond": "friendship_with_exchange", "eevee": None},
+]
+
+# A program using every construct the evaluators support
+PROGRAM = "let pokemon, level = 20, evo_cond = \"solar_stone\", eevee = \"eevee\"\n" + RULES + EXPRESSIONS
+
+
+def parse(source: str):
+    return Parser(Lexer(source).get_tokens()).parse()
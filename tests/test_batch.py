@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from src.batch import parse_many
+from src.lexer import Lexer
+from src.token_parser import Parser
+
+
+class BatchTestCase(unittest.TestCase):
+    maxDiff = None
+
+    sources = [
+        "let pokemon = \"eevee\"\n",
+        "if level > 16 then\n    pokemon = \"ivysaur\"\n",
+        "let = 5\n",
+        "level += 1\n",
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.paths = []
+        for index, source in enumerate(self.sources):
+            path = os.path.join(directory.name, f"rule_{index}.eve")
+            with open(path, "w") as file:
+                file.write(source)
+            self.paths.append(path)
+        self.paths.append(os.path.join(directory.name, "missing.eve"))
+
+    def test_parse_many(self):
+        for workers in (1, 2):
+            results = parse_many(self.paths, workers=workers, chunksize=1)
+
+            self.assertEqual([result.path for result in results], self.paths)
+            self.assertEqual([result.ok for result in results], [True, True, False, True, False])
+
+            for index in (0, 1, 3):
+                expected = Parser(Lexer(self.sources[index]).get_tokens()).parse()
+                self.assertEqual(str(results[index].load()), str(expected))
+
+            self.assertEqual(results[2].error.type, "SyntaxError")
+            self.assertEqual((results[2].error.line, results[2].error.column), (1, 5))
+            self.assertEqual(results[2].error.message, "Expected IDENT, but got =")
+            self.assertEqual(results[4].error.type, "FileNotFoundError")
+
+            with self.assertRaises(ValueError):
+                results[2].load()
+
+    def test_parse_many_empty(self):
+        self.assertEqual(parse_many([]), [])
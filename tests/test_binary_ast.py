@@ -0,0 +1,64 @@
+import io
+import unittest
+
+from src.binary_ast import dump, dumps, load, loads
+from src.lexer import Lexer
+from src.token_parser import IterativeParser, Parser
+
+
+class BinaryASTTestCase(unittest.TestCase):
+    maxDiff = None
+
+    input = (
+        "let pokemon, level = 5, rate = 2.5, shiny = false, held = nil\n"
+        "if (level > 16 is true) and not_evolved then\n"
+        "    pokemon = \"ivysaur\"\n"
+        "    (level) += rate * 2\n"
+        "else pokemon = \"bulbasaur\"\n"
+        "let big = 300000000000000000000, name = \"évoli\"\n"
+    )
+
+    def test_round_trip(self):
+        ast = Parser(Lexer(self.input).get_tokens()).parse()
+
+        data = dumps(ast)
+
+        self.assertTrue(data.startswith(b"EVEAST"))
+        self.assertEqual(str(loads(data)), str(ast))
+
+        file = io.BytesIO()
+        dump(ast, file)
+        file.seek(0)
+        self.assertEqual(str(load(file)), str(ast))
+
+    def test_literals(self):
+        # The grammar has no unary minus, so negative values are set directly
+        ast = Parser(Lexer("5\n2\n0.125\n").get_tokens()).parse()
+        ast.statements[0].expression.value = -5
+        ast.statements[1].expression.value = -2 ** 70
+        ast.statements[2].expression.value = -0.125
+
+        self.assertEqual(str(loads(dumps(ast))), str(ast))
+
+    def test_deep_nesting(self):
+        ast = IterativeParser(Lexer("if a then " * 5000 + "x\n").get_tokens()).parse()
+
+        self.assertEqual(type(loads(dumps(ast))).__name__, "Program")
+
+    def test_invalid(self):
+        data = dumps(Parser(Lexer(self.input).get_tokens()).parse())
+
+        for invalid in (b"", b"EEVEE", b"EVEAST\x02", data[:-2], data[:12]):
+            with self.assertRaises(ValueError):
+                loads(invalid)
+
+    def test_corrupt(self):
+        data = dumps(Parser(Lexer("a\nb\n").get_tokens()).parse())
+        self.assertEqual(data[-2:], bytes([data[-2], 2]))
+
+        # The Program claims more statements than were decoded
+        with self.assertRaises(ValueError):
+            loads(data[:-1] + b"\x03")
+        # A string runs past the end of the data
+        with self.assertRaises(ValueError):
+            loads(data[:8] + b"\x7f" + data[9:])
@@ -0,0 +1,55 @@
+import unittest
+
+from src.bytecode import compile_program, run
+from src.evaluator import evaluate
+from tests.helpers import MAIN_INPUTS, MAIN_SOURCE, PROGRAM, parse
+
+
+class BytecodeTestCase(unittest.TestCase):
+    maxDiff = None
+
+    def test_run(self):
+        ast = parse(PROGRAM)
+
+        self.assertEqual(run(compile_program(ast)), evaluate(ast))
+
+    def test_disassemble(self):
+        code = compile_program(parse("a = b and c or 1\nif a then x = 1 else x += 2\n"))
+
+        self.assertEqual(code.disassemble(), [
+            "   0 LOAD_SLOT b",
+            "   2 JUMP_IF_FALSE_OR_POP 6",
+            "   4 LOAD_SLOT c",
+            "   6 JUMP_IF_TRUE_OR_POP 10",
+            "   8 LOAD_CONST 1",
+            "  10 STORE_SLOT a",
+            "  12 LOAD_SLOT a",
+            "  14 JUMP_IF_FALSE 22",
+            "  16 LOAD_CONST 1",
+            "  18 STORE_SLOT x",
+            "  20 JUMP 30",
+            "  22 LOAD_SLOT x",
+            "  24 LOAD_CONST 2",
+            "  26 BINARY_OP +",
+            "  28 STORE_SLOT x",
+        ])
+        self.assertEqual(code.instructions.typecode, "i")
+
+    def test_inputs(self):
+        code = compile_program(parse(
+            "if level > 16 then evolved = true else evolved = false\n"
+            "level += 1\n"
+        ))
+
+        self.assertEqual(run(code, {"level": 20, "unused": 1}), {"level": 21, "evolved": True})
+        self.assertEqual(run(code, {"level": 3}), {"level": 4, "evolved": False})
+        with self.assertRaises(TypeError):
+            run(code)
+
+    def test_main_source(self):
+        ast = parse(MAIN_SOURCE)
+        code = compile_program(ast)
+
+        for inputs in MAIN_INPUTS:
+            with self.subTest(inputs=inputs):
+                self.assertEqual(run(code, inputs), evaluate(ast, inputs))
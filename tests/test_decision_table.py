@@ -0,0 +1,63 @@
+import unittest
+
+from src.decision_table import DecisionTable, split_runs
+from src.evaluator import Evaluator
+from tests.helpers import parse
+
+
+class DecisionTableTestCase(unittest.TestCase):
+    maxDiff = None
+
+    rules = (
+        "if evo_cond == \"solar_stone\" then\n"
+        "    eevee = \"leafeon\"\n"
+        "if evo_cond == \"friendship_with_exchange\" then eevee = \"sylveon\"\n"
+        "if evo_cond == \"friendship_at_night\" then eevee = \"umbreon\" else eevee = \"espeon\"\n"
+        "if evo_cond is 1 then level = 1 else if evo_cond is true then level = 2 else if evo_cond not nil then level = 3\n"
+        "if evo_cond == \"moon_stone\" then\n"
+        "    if evo_cond == \"solar_stone\" then unreachable = true\n"
+        "    if level > 1 then level += 1\n"
+        "count = 1\n"
+    )
+
+    def test_split_runs(self):
+        runs = split_runs(parse(self.rules).statements)
+
+        self.assertEqual(len(runs), 2)
+        table = runs[0]
+        self.assertIsInstance(table, DecisionTable)
+        self.assertEqual(table.name, "evo_cond")
+        self.assertEqual(list(table.cases), ["solar_stone", "friendship_with_exchange", "friendship_at_night", 1, None, "moon_stone"])
+        self.assertEqual([str(statement) for statement in table.cases["moon_stone"]], [
+            str(parse("eevee = \"espeon\"\nlevel = 3\nif level > 1 then level += 1\n").statements[index]) for index in range(3)
+        ])
+        self.assertEqual([str(statement) for statement in table.cases[None]], [str(parse("eevee = \"espeon\"\n").statements[0])])
+        self.assertEqual(len(table.default), 2)
+        self.assertEqual(str(runs[1]), str(parse("count = 1\n").statements[0]))
+
+    def test_evaluate(self):
+        for value in ("\"solar_stone\"", "\"friendship_at_night\"", "\"moon_stone\"", "\"other\"", "1", "1.0", "true", "false", "nil"):
+            source = f"let evo_cond = {value}, level = 2\n" + self.rules
+            with self.subTest(value=value):
+                self.assertEqual(Evaluator().evaluate(parse(source)), Evaluator(decision_tables=False).evaluate(parse(source)))
+
+    def test_fallback(self):
+        for source in (
+            # Too few tests
+            "if a == 1 then b = 1\nc = 2\n",
+            # Not a constant
+            "if a == b then c = 1\nif a == d then c = 2\n",
+            # The tested variable changes between tests
+            "if a == 1 then a = 2\nif a == 2 then b = 1\n",
+            "if a == 1 then b = (a = 2)\nif a == 2 then b = 1\n",
+        ):
+            with self.subTest(source=source):
+                statements = parse(source).statements
+                self.assertEqual([str(statement) for statement in split_runs(statements)], [str(statement) for statement in statements])
+
+    def test_assigned_after_run(self):
+        source = "let a = 1\nif a == 1 then b = 1\nif a == 2 then b = 2\nif a == 1 then a = 2\nif a == 2 then c = 1\n"
+        ast = parse(source)
+
+        self.assertIsInstance(split_runs(ast.statements)[1], DecisionTable)
+        self.assertEqual(Evaluator().evaluate(ast), {"a": 2, "b": 1, "c": 1})
@@ -0,0 +1,76 @@
+import unittest
+
+from src.evaluator import Evaluator, evaluate
+from src.flat_ast import FlatAST
+from src.lexer import Lexer
+from src.token_parser import Parser
+from tests.helpers import MAIN_INPUTS, MAIN_SOURCE, PROGRAM, parse
+
+
+class EvaluatorTestCase(unittest.TestCase):
+    maxDiff = None
+
+    def test_evaluate(self):
+        self.assertEqual(evaluate(parse(PROGRAM)), {
+            "pokemon": "ivysaur",
+            "level": 20,
+            "evo_cond": "solar_stone",
+            "eevee": "espeon",
+            "a": 8,
+            "b": 1,
+            "c": 7.0,
+            "d": 1.5,
+            "e": 1.5,
+            "f": "pikachu",
+            "g": "pikachu",
+            "h": False,
+            "i": None,
+            "j": True,
+            "k": None,
+            "l": "default",
+            "m": 2,
+        })
+
+    def test_inputs(self):
+        ast = parse(MAIN_SOURCE)
+
+        self.assertEqual([evaluate(ast, inputs) for inputs in MAIN_INPUTS], [
+            {"pokemon": "ivysaur", "level": 20, "evo_cond": "solar_stone", "eevee": "espeon"},
+            {"pokemon": "bulbasaur", "level": 5, "evo_cond": None, "eevee": "missingno"},
+            {"pokemon": "ivysaur", "level": 17, "evo_cond": "friendship_at_night", "eevee": "umbreon"},
+            {"pokemon": "bulbasaur", "level": 16, "evo_cond": "friendship_with_exchange", "eevee": "missingno"},
+        ])
+        self.assertEqual(evaluate(ast, dict(MAIN_INPUTS[0], unused=1)), evaluate(ast, MAIN_INPUTS[0]))
+        self.assertEqual(evaluate(parse("let a = 1, b\nlet a, c\n"), {"b": 2}), {"a": 1, "b": 2, "c": None})
+
+    def test_flat_scope(self):
+        variables = evaluate(parse(
+            "let level\n"
+            "if true then\n"
+            "    let shiny = true\n"
+            "    level = 5\n"
+            "if level < 3 then evolved = true\n"
+        ))
+
+        self.assertEqual(variables, {"level": 5, "shiny": True, "evolved": None})
+
+    def test_errors(self):
+        with self.assertRaises(ZeroDivisionError):
+            evaluate(parse("let a = 1 / 0\n"))
+        with self.assertRaises(TypeError):
+            evaluate(parse("let a = nil + 1\n"))
+
+    def test_views_and_reuse(self):
+        ast = parse(PROGRAM)
+        expected = evaluate(ast)
+
+        self.assertEqual(evaluate(FlatAST.from_tree(ast).root), expected)
+        self.assertEqual(evaluate(Parser(Lexer(PROGRAM).get_tokens(), skim=True).parse()), expected)
+
+        evaluator = Evaluator()
+        run = evaluator.compile(parse("let count = 0\ncount += 1\n"))
+        increment = evaluator.compile(parse("count += 1\n"))
+        run()
+        increment()
+        increment()
+        self.assertEqual(evaluator.variables(), {"count": 3})
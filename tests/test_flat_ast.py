@@ -0,0 +1,65 @@
+import unittest
+
+from src.flat_ast import FlatAST
+from src.lexer import Lexer
+from src.token_parser import IterativeParser, Parser
+
+
+class FlatASTTestCase(unittest.TestCase):
+    maxDiff = None
+
+    input = (
+        "let pokemon, level = 5, rate = 2.5, shiny = false, held = nil\n"
+        "if (level > 16 is true) and not_evolved then\n"
+        "    pokemon = \"ivysaur\"\n"
+        "    (level) += rate * 2\n"
+        "else pokemon = \"bulbasaur\"\n"
+    )
+
+    def test_parse_flat(self):
+        tree = Parser(Lexer(self.input).get_tokens()).parse()
+        flat = Parser(Lexer(self.input).get_tokens(), flat=True).parse()
+
+        self.assertEqual(type(flat).__name__, "FlatAST")
+        self.assertEqual(str(flat.root), str(tree))
+        self.assertEqual(str(flat.to_tree()), str(tree))
+
+        iterative = IterativeParser(Lexer(self.input).get_tokens(), flat=True).parse()
+        self.assertEqual(str(iterative.root), str(tree))
+
+    def test_views(self):
+        flat = Parser(Lexer(self.input).get_tokens(), flat=True).parse()
+
+        declarations = flat.root.statements[0].declarations
+        self.assertEqual([declaration.identifier.name for declaration in declarations], ["pokemon", "level", "rate", "shiny", "held"])
+        self.assertIsNone(declarations[0].initializer)
+        self.assertEqual(declarations[2].initializer.value, 2.5)
+        self.assertIs(declarations[3].initializer.value, False)
+
+        if_statement = flat.root.statements[1]
+        self.assertEqual(if_statement.condition.operator, "and")
+        self.assertEqual(if_statement.condition.left.right.value, True)
+        self.assertEqual(if_statement.consequent.statements[1].expression.operator, "+=")
+        self.assertEqual(if_statement.alternate.expression.right.value, '"bulbasaur"')
+
+    def test_from_tree(self):
+        tree = Parser(Lexer(self.input).get_tokens()).parse()
+
+        flat = FlatAST.from_tree(tree)
+
+        self.assertEqual(str(flat.root), str(tree))
+        self.assertEqual(flat.kinds, Parser(Lexer(self.input).get_tokens(), flat=True).parse().kinds)
+
+    def test_reparse(self):
+        lexer = Lexer(self.input)
+        parser = Parser(lexer.get_tokens(), flat=True)
+        flat = parser.parse()
+
+        start = self.input.index("ivysaur")
+        new_flat = parser.reparse(flat, *lexer.relex(start, start + 7, "venusaur"))
+        expected = Parser(Lexer(lexer.source).get_tokens(), flat=True).parse()
+
+        self.assertIsNot(new_flat, flat)
+        self.assertEqual(new_flat.kinds, expected.kinds)
+        self.assertEqual(str(new_flat.root), str(expected.root))
+        self.assertEqual(len(flat.kinds), len(expected.kinds))
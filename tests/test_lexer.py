@@ -1,6 +1,9 @@
+import io
+import os
+import tempfile
 import unittest
 
-from src.lexer import Lexer, Token
+from src.lexer import Lexer, Token, TokenBuffer
 
 
 class LexerTestCase(unittest.TestCase):
@@ -37,3 +40,165 @@ class LexerTestCase(unittest.TestCase):
         ]
 
         self.assertEqual(tokens, expected)
+
+    def test_tokenize_operators(self):
+        input = 'a += 1.5 && b<=c or "x y" # ?'
+
+        tokens = Lexer(input).get_tokens()
+
+        expected = [
+            Token('IDENT', "a", 1, 1),
+            Token('+=', "+=", 1, 3),
+            Token('FLOAT', "1.5", 1, 6),
+            Token('&&', "&&", 1, 10),
+            Token('IDENT', "b", 1, 13),
+            Token('<=', "<=", 1, 14),
+            Token('IDENT', "c", 1, 16),
+            Token('||', "or", 1, 18),
+            Token('STRING', '"x y"', 1, 21),
+            Token('ILLEGAL', "#", 1, 27),
+            Token('ILLEGAL', "?", 1, 29),
+            Token('EOF', "", 2, 1),
+        ]
+
+        self.assertEqual(tokens, expected)
+
+    def test_tokenize_dedent_column(self):
+        input = "a\n    b\n        c\n    d"
+
+        tokens = Lexer(input).get_tokens()
+
+        self.assertEqual(tokens[-4:], [
+            Token('DEDENT', "", 4, 1),
+            Token('IDENT', "d", 4, 5),
+            Token('DEDENT', "", 5, 1),
+            Token('EOF', "", 5, 1),
+        ])
+
+    def test_iter_tokens_from_stream(self):
+        input = "let a = 1\nif a then\n    a += 2\n        a\nb\n"
+
+        streamed = list(Lexer(io.StringIO(input)).iter_tokens())
+        from_lines = list(Lexer(input.split("\n")).iter_tokens())
+
+        self.assertEqual(streamed, Lexer(input).get_tokens())
+        self.assertEqual(from_lines, Lexer(input).get_tokens())
+        self.assertEqual(list(Lexer(iter([])).iter_tokens()), Lexer("").get_tokens())
+
+    def test_from_path(self):
+        input = 'let a = "eevee"\nif a then\n    a = 1.5 ?\n'
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "source.eve")
+            with open(path, "w") as file:
+                file.write(input)
+
+            with Lexer.from_path(path) as lexer:
+                tokens = lexer.get_tokens()
+            with Lexer.from_path(path, buffered=True) as buffered:
+                self.assertEqual(list(buffered.get_tokens()), tokens)
+
+        self.assertEqual(tokens, Lexer(input).get_tokens())
+        self.assertTrue(lexer.source.closed)
+        self.assertTrue(buffered.source.closed)
+
+    def test_token_buffer(self):
+        input = 'let a = "eevee"\nif a then\n    a = 1.5\n        b\n'
+
+        buffer = Lexer(input, buffered=True).get_tokens()
+        tokens = Lexer(input).get_tokens()
+
+        self.assertIsInstance(buffer, TokenBuffer)
+        self.assertEqual(len(buffer), len(tokens))
+        self.assertEqual(list(buffer), tokens)
+        self.assertEqual([buffer[i] for i in range(len(buffer))], tokens)
+        self.assertEqual(buffer[-1], tokens[-1])
+        self.assertEqual(buffer[2:5], tokens[2:5])
+        self.assertEqual(buffer.literal(3), '"eevee"')
+
+    def test_tokenize_parallel(self):
+        class SmallChunkLexer(Lexer):
+            PARALLEL_CHUNK_SIZE = 32
+
+        input = (
+            "let a = \"évoli\"\n"
+            "if a then\n"
+            "    a = 1.5\n"
+            "        b\n"
+            "\n"
+            "    c\n"
+            "d\n"
+        ) * 8 + "if d then\n    e"
+
+        self.assertGreater(len(SmallChunkLexer(input).split_top_level(8)), 4)
+
+        for source in (input, input.encode()):
+            for buffered in (False, True):
+                tokens = list(Lexer(source, buffered=buffered).get_tokens())
+                parallel = SmallChunkLexer(source, buffered=buffered, workers=2)
+
+                self.assertEqual(list(parallel.get_tokens()), tokens)
+
+        # Relexing works the same after lexing in parallel
+        lexer = Lexer(input)
+        parallel = SmallChunkLexer(input, workers=2)
+        self.assertEqual(parallel.line_indents, lexer.line_indents)
+        start = input.index("    c\n")
+        self.assertEqual(parallel.relex(start, start + 4, "  "), lexer.relex(start, start + 4, "  "))
+        self.assertEqual(list(parallel.get_tokens()), list(lexer.get_tokens()))
+
+    def test_relex(self):
+        input = (
+            "let a = \"eevee\"\n"
+            "if a then\n"
+            "    a = 1.5\n"
+            "        b\n"
+            "c\n"
+            "d\n"
+        )
+        lexer = Lexer(input)
+
+        # Same line count: only the edited line is lexed again
+        start = input.index("1.5")
+        self.assertEqual(lexer.relex(start, start + 3, "25"), (7, 11, 11))
+        self.assertEqual(lexer.source, input.replace("1.5", "25"))
+        self.assertEqual(lexer.get_tokens(), Lexer(lexer.source).get_tokens())
+
+        # New lines shift the line numbers of the tokens after them
+        start = lexer.source.index("c")
+        lexer.relex(start, start, "if c then\n    d\n")
+        self.assertEqual(lexer.get_tokens(), Lexer(lexer.source).get_tokens())
+
+        # Changing an indentation relexes until the blocks line up again
+        start = lexer.source.index("    a")
+        lexer.relex(start, start + 4, "  ")
+        self.assertEqual(lexer.get_tokens(), Lexer(lexer.source).get_tokens())
+        self.assertEqual(lexer.line_indents, Lexer(lexer.source).line_indents)
+
+        lexer.relex(0, len(lexer.source), "")
+        self.assertEqual(lexer.get_tokens(), [Token('EOF', "", 2, 1)])
+
+        with self.assertRaises(TypeError):
+            Lexer(input, buffered=True).relex(0, 0, "a")
+
+    def test_relex_line_shifts(self):
+        input = "let a = 1\nif a then\n    b = a\n    if b then\n        c\nd\n" * 4
+        lexer = Lexer(input)
+        lexer.tokens.MAX_SHIFTS = 4
+        insertions = ("e\n", "    f\n\n", "if e then\n    g\n", "")
+
+        for edit in range(24):
+            source = lexer.source
+            line_starts = [0] + [index + 1 for index, char in enumerate(source) if char == "\n"]
+            start = line_starts[edit * 7 % len(line_starts)]
+            if edit % 4 == 3:
+                # Removes a line
+                end = source.find("\n", start) + 1 or len(source)
+                lexer.relex(start, end, "")
+            else:
+                lexer.relex(start, start, insertions[edit % 4])
+            expected = Lexer(lexer.source).get_tokens()
+
+            self.assertEqual(list(lexer.get_tokens()), list(expected))
+            self.assertEqual([lexer.tokens[index] for index in range(-len(expected), 0)], list(expected))
+            self.assertLessEqual(len(lexer.tokens.shift_starts), 4)
@@ -0,0 +1,152 @@
+import io
+import json
+import unittest
+
+from src.node import (
+    BinaryExpression,
+    BlockStatement,
+    BoolLiteral,
+    ExpressionStatement,
+    FloatLiteral,
+    Identifier,
+    IfStatement,
+    IntegerLiteral,
+    LazyBlockStatement,
+    NodeDecoder,
+    NodeEncoder,
+    NodeReader,
+    NodeWriter,
+    NullLiteral,
+    Program,
+    StringLiteral,
+    VariableDeclaration,
+    VariableStatement,
+)
+
+
+class NodeTestCase(unittest.TestCase):
+    maxDiff = None
+
+    def test_nodes_have_no_dict(self):
+        node = BinaryExpression("+", Identifier("a"), IntegerLiteral(1))
+
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
+    def test_node_encoder(self):
+        ast = Program([
+            ExpressionStatement(BinaryExpression("+", Identifier("a"), NullLiteral())),
+        ])
+
+        encoded = json.loads(json.dumps(ast, cls=NodeEncoder))
+
+        self.assertEqual(encoded, {
+            "-__type__": "Program",
+            "-__data__": {"statements": [{
+                "-__type__": "ExpressionStatement",
+                "-__data__": {"expression": {
+                    "-__type__": "BinaryExpression",
+                    "-__data__": {
+                        "operator": "+",
+                        "left": {"-__type__": "Identifier", "-__data__": {"name": "a"}},
+                        "right": {"-__type__": "NullLiteral", "-__data__": {}},
+                    },
+                }},
+            }]},
+        })
+
+    def test_lazy_block_statement(self):
+        calls = []
+
+        def parse_body():
+            calls.append(True)
+            return [ExpressionStatement(Identifier("a"))]
+
+        block = LazyBlockStatement(parse_body)
+        ast = Program([IfStatement(Identifier("a"), block)])
+
+        self.assertFalse(block.is_parsed)
+        self.assertEqual(
+            json.dumps(ast, cls=NodeEncoder),
+            json.dumps(Program([IfStatement(Identifier("a"), BlockStatement([ExpressionStatement(Identifier("a"))]))]), cls=NodeEncoder),
+        )
+        self.assertIs(block.statements, block.statements)
+        self.assertEqual(len(calls), 1)
+        self.assertIs(type(json.loads(json.dumps(block, cls=NodeEncoder), cls=NodeDecoder)), BlockStatement)
+
+    def test_node_writer(self):
+        ast = Program([
+            VariableStatement([
+                VariableDeclaration(Identifier("pokemon")),
+                VariableDeclaration(Identifier("level"), FloatLiteral(16.5)),
+            ]),
+            IfStatement(
+                BinaryExpression("==", Identifier("evo_cond"), StringLiteral('"pierre \u00e9clat"')),
+                BlockStatement([ExpressionStatement(BoolLiteral(True)), BlockStatement([])]),
+                ExpressionStatement(NullLiteral()),
+            ),
+        ])
+
+        for indent in (None, 0, 2):
+            file = io.StringIO()
+            NodeWriter(file, indent).write(ast)
+
+            self.assertEqual(file.getvalue(), json.dumps(ast, cls=NodeEncoder, indent=indent))
+
+    def test_node_decoder(self):
+        ast = Program([
+            VariableStatement([VariableDeclaration(Identifier("level"), FloatLiteral(16.5))]),
+            IfStatement(
+                BinaryExpression("==", Identifier("evo_cond"), StringLiteral('"pierre \u00e9clat"')),
+                BlockStatement([ExpressionStatement(BoolLiteral(True)), BlockStatement([])]),
+                ExpressionStatement(NullLiteral()),
+            ),
+        ])
+
+        decoded = json.loads(json.dumps(ast, cls=NodeEncoder), cls=NodeDecoder)
+
+        self.assertIsInstance(decoded, Program)
+        self.assertEqual(str(decoded), str(ast))
+
+        with self.assertRaises(ValueError):
+            json.loads('{"-__type__": "Pokemon", "-__data__": {}}', cls=NodeDecoder)
+
+    def test_node_reader(self):
+        ast = Program([
+            VariableStatement([
+                VariableDeclaration(Identifier("pokemon")),
+                VariableDeclaration(Identifier("level"), IntegerLiteral(-16)),
+                VariableDeclaration(Identifier("rate"), FloatLiteral(1e-05)),
+            ]),
+            IfStatement(
+                BinaryExpression("==", Identifier("evo_cond"), StringLiteral('"pierre \u00e9clat"')),
+                BlockStatement([ExpressionStatement(BoolLiteral(False)), BlockStatement([])]),
+                ExpressionStatement(NullLiteral()),
+            ),
+        ])
+
+        for indent in (None, 2):
+            for chunk_size in (1, 7, NodeReader.CHUNK_SIZE):
+                reader = NodeReader(io.StringIO(json.dumps(ast, cls=NodeEncoder, indent=indent)))
+                reader.CHUNK_SIZE = chunk_size
+
+                self.assertEqual(str(reader.read()), str(ast))
+
+    def test_node_reader_deep_nesting(self):
+        ast = ExpressionStatement(IntegerLiteral(1))
+        for _ in range(20000):
+            ast = IfStatement(Identifier("a"), ast)
+
+        file = io.StringIO()
+        NodeWriter(file).write(Program([ast]))
+        file.seek(0)
+
+        program = NodeReader(file).read()
+
+        self.assertIsInstance(program, Program)
+
+    def test_node_reader_invalid(self):
+        for text in ("", "[", '{"-__type__": "Program", "-__data__": {"statements": []}', "]", "{}"):
+            with self.assertRaises(ValueError):
+                NodeReader(io.StringIO(text)).read()
@@ -0,0 +1,102 @@
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from src.lexer import Lexer
+from src.parse_cache import GRAMMAR_STAMP, ParseCache, grammar_stamp
+from src.token_parser import Parser
+
+
+class ParseCacheTestCase(unittest.TestCase):
+    maxDiff = None
+
+    input = (
+        "let pokemon, level = 5\n"
+        "if level > 16 then\n"
+        "    pokemon = \"ivysaur\"\n"
+        "else pokemon = \"bulbasaur\"\n"
+    )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_hit(self):
+        cache = ParseCache(self.directory.name)
+        expected = str(Parser(Lexer(self.input).get_tokens()).parse())
+
+        self.assertEqual(str(cache.parse(self.input)), expected)
+        self.assertEqual(str(cache.parse(self.input)), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # A new cache over the same directory starts warm
+        cache = ParseCache(self.directory.name)
+        self.assertEqual(str(cache.parse(self.input)), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+        cache.parse(self.input + "level += 1\n")
+        self.assertEqual(cache.misses, 1)
+
+    def test_corrupt_entry(self):
+        cache = ParseCache(self.directory.name)
+        cache.parse(self.input)
+
+        with open(cache.path(cache.key(self.input)), "wb") as file:
+            file.write(b"EVEAST\x01\x00\x10")
+
+        self.assertEqual(str(cache.parse(self.input)), str(Parser(Lexer(self.input).get_tokens()).parse()))
+        self.assertEqual(cache.misses, 2)
+
+    def test_unreadable_entry(self):
+        cache = ParseCache(self.directory.name)
+        os.mkdir(cache.path(cache.key(self.input)))
+
+        self.assertIsNone(cache.get(self.input))
+
+    def test_overwrite(self):
+        cache = ParseCache(self.directory.name)
+        ast = cache.parse(self.input)
+        size = cache.size
+
+        cache.put(self.input, ast)
+
+        self.assertEqual(cache.size, size)
+        self.assertEqual(ParseCache(self.directory.name).size, size)
+
+    def test_grammar_stamp(self):
+        self.assertEqual(grammar_stamp(), GRAMMAR_STAMP)
+
+        with mock.patch("src.parse_cache.INDENT_PATTERN", re.compile(r"[ ]*")):
+            self.assertNotEqual(grammar_stamp(), GRAMMAR_STAMP)
+        with mock.patch("src.parse_cache.TOKEN_PATTERN", re.compile(r"(?P<IDENT>[a-z]+)")):
+            self.assertNotEqual(grammar_stamp(), GRAMMAR_STAMP)
+
+    def test_syntax_error_not_cached(self):
+        cache = ParseCache(self.directory.name)
+
+        with self.assertRaises(SyntaxError):
+            cache.parse("let = 1\n")
+
+        self.assertEqual(cache.entries(), [])
+
+    def test_lru_eviction(self):
+        sources = [f"let pokemon_{index} = {index}\n" for index in range(3)]
+        cache = ParseCache(self.directory.name)
+        cache.parse(sources[0])
+        size = cache.size
+        cache.max_bytes = 2 * size
+
+        cache.parse(sources[1])
+        os.utime(cache.path(cache.key(sources[0])), ns=(1, 1_000_000_000))
+        os.utime(cache.path(cache.key(sources[1])), ns=(1, 2_000_000_000))
+        # Reading the oldest entry makes it the most recently used one
+        cache.parse(sources[0])
+        cache.parse(sources[2])
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.size, 2 * size)
+        self.assertTrue(os.path.exists(cache.path(cache.key(sources[0]))))
+        self.assertFalse(os.path.exists(cache.path(cache.key(sources[1]))))
+        self.assertTrue(os.path.exists(cache.path(cache.key(sources[2]))))
@@ -1,6 +1,8 @@
 from typing import List
+import io
 import unittest
 
+from src.binary_ast import dumps
 from src.lexer import (
     AND,
     ASSIGN,
@@ -48,6 +50,7 @@ from src.lexer import (
     STRING,
     THEN,
     TRUE,
+    Lexer,
     Token,
 )
 
@@ -70,7 +73,7 @@ from src.node import (
     VariableDeclaration,
     VariableStatement,
 )
-from src.token_parser import Parser
+from src.token_parser import IterativeParser, Parser
 
 
 class ParserTestCase(unittest.TestCase):
@@ -599,6 +602,185 @@ class ParserTestCase(unittest.TestCase):
 
         self.assertEqual(str(ast), str(expected_ast))
 
+    def test_parse_chained_operators(self):
+        input = "a + b - c + d\na and b and c or d\n"
+
+        ast = Parser(Lexer(input).get_tokens()).parse()
+
+        expected_ast = Program([
+            make_expression_statement(make_binary_expression(
+                PLUS,
+                make_binary_expression(
+                    MINUS,
+                    make_binary_expression(PLUS, make_identifier("a"), make_identifier("b")),
+                    make_identifier("c"),
+                ),
+                make_identifier("d"),
+            )),
+            make_expression_statement(make_logical_expression(
+                "or",
+                make_logical_expression(
+                    "and",
+                    make_logical_expression("and", make_identifier("a"), make_identifier("b")),
+                    make_identifier("c"),
+                ),
+                make_identifier("d"),
+            )),
+        ])
+
+        self.assertEqual(str(ast), str(expected_ast))
+
+    def test_iterative_parser(self):
+        input = (
+            "let a = 1, b, c = d = 2 + 3 * (4 - x) % y\n"
+            "if a > b is true and (c or d) then\n"
+            "    x += 1\n"
+            "    if y then z = ((1)) else\n"
+            "        w\n"
+            "else (q) = \"x\"\n"
+        )
+
+        ast = IterativeParser(Lexer(input).get_tokens()).parse()
+
+        self.assertEqual(str(ast), str(Parser(Lexer(input).get_tokens()).parse()))
+
+        with self.assertRaises(SyntaxError):
+            IterativeParser(Lexer("x = (a + b\n").get_tokens()).parse()
+        with self.assertRaises(SyntaxError):
+            IterativeParser(Lexer("a + b = c\n").get_tokens()).parse()
+
+    def test_iterative_parser_deep_nesting(self):
+        depth = 5000
+        input = "if a then " * depth + "(" * depth + "x" + ")" * depth + "\n"
+
+        ast = IterativeParser(Lexer(input).get_tokens()).parse()
+
+        node = ast.statements[0]
+        for _ in range(depth):
+            self.assertEqual(type(node).__name__, "IfStatement")
+            node = node.consequent
+        self.assertEqual(str(node), str(make_expression_statement(make_identifier("x"))))
+
+    def test_parse_token_stream(self):
+        input = (
+            "let pokemon\n"
+            "if level > 16 then\n"
+            "    pokemon = \"ivysaur\"\n"
+            "else pokemon = \"bulbasaur\"\n"
+        )
+
+        ast = Parser(Lexer(io.StringIO(input)).iter_tokens()).parse()
+
+        self.assertEqual(str(ast), str(Parser(Lexer(input).get_tokens()).parse()))
+        self.assertIsNone(Parser(iter([])).parse())
+
+    def test_parse_token_buffer(self):
+        input = (
+            "let pokemon, level = 5\n"
+            "if level > 16 then\n"
+            "    pokemon = \"ivysaur\"\n"
+        )
+
+        ast = Parser(Lexer(input, buffered=True).get_tokens()).parse()
+
+        self.assertEqual(str(ast), str(Parser(Lexer(input).get_tokens()).parse()))
+
+    def test_iter_statements(self):
+        input = [
+            "let pokemon\n",
+            "if level > 16 then\n",
+            "    pokemon = \"ivysaur\"\n",
+            "else pokemon = \"bulbasaur\"\n",
+            "level += 1\n",
+        ]
+        lines_read = []
+
+        def read_lines():
+            for line in input:
+                lines_read.append(line)
+                yield line
+
+        parser = Parser(Lexer(read_lines()).iter_tokens())
+        statements = parser.iter_statements()
+
+        self.assertEqual(str(next(statements)), str(make_variable_statement([make_variable_declaration(make_identifier("pokemon"), None)])))
+        self.assertEqual(len(lines_read), 2)
+
+        expected = Parser(Lexer("".join(input)).get_tokens()).parse()
+        self.assertEqual(str(next(statements)), str(expected.statements[1]))
+        self.assertEqual(len(lines_read), 5)
+        self.assertEqual([str(statement) for statement in statements], [str(expected.statements[2])])
+        self.assertIsNone(parser.statement_spans)
+        self.assertEqual(list(Parser(iter([])).iter_statements()), [])
+
+    def test_skim(self):
+        input = (
+            "let pokemon, level = 5\n"
+            "if level > 16 then\n"
+            "    pokemon = \"ivysaur\"\n"
+            "    if shiny then\n"
+            "        level += 1\n"
+            "else pokemon = \"bulbasaur\"\n"
+            "if level then\n"
+            "    let = 1\n"
+        )
+
+        ast = Parser(Lexer(input).get_tokens(), skim=True).parse()
+
+        block = ast.statements[1].consequent
+        self.assertEqual(type(block).__name__, "LazyBlockStatement")
+        self.assertFalse(block.is_parsed)
+        self.assertEqual(str(ast.statements[1].condition), "BinaryExpression(>, Identifier(level), IntegerLiteral(16))")
+
+        expected = Parser(Lexer(input.replace("let = 1", "level = 1")).get_tokens()).parse()
+        self.assertEqual(str(block), str(expected.statements[1].consequent))
+        self.assertTrue(block.is_parsed)
+        self.assertEqual(type(block.statements[1].consequent).__name__, "LazyBlockStatement")
+
+        with self.assertRaises(SyntaxError):
+            ast.statements[2].consequent.statements
+
+        ast = IterativeParser(Lexer(input).get_tokens(), skim=True).parse()
+        self.assertEqual(str(ast.statements[1]), str(expected.statements[1]))
+
+    def test_skim_serializes_as_block(self):
+        input = "if level > 16 then\n    pokemon = \"ivysaur\"\n"
+        ast = Parser(Lexer(input).get_tokens(), skim=True).parse()
+
+        self.assertEqual(ast.statements[0].consequent.node_class.__name__, "BlockStatement")
+        self.assertEqual(dumps(ast), dumps(Parser(Lexer(input).get_tokens()).parse()))
+
+    def test_reparse(self):
+        input = (
+            "let pokemon, level = 5\n"
+            "if level > 16 then\n"
+            "    pokemon = \"ivysaur\"\n"
+            "let shiny = false\n"
+            "level += 1\n"
+        )
+        lexer = Lexer(input)
+        parser = Parser(lexer.get_tokens())
+        ast = parser.parse()
+
+        # Only the edited statement is parsed again
+        start = input.index("ivysaur")
+        new_ast = parser.reparse(ast, *lexer.relex(start, start + 7, "venusaur"))
+        self.assertEqual(str(new_ast), str(Parser(Lexer(lexer.source).get_tokens()).parse()))
+        self.assertEqual([new is old for new, old in zip(new_ast.statements, ast.statements)], [True, False, True, True])
+
+        # An edit can merge statements: "else" now continues the `if` above it
+        ast = new_ast
+        start = lexer.source.index("let shiny")
+        new_ast = parser.reparse(ast, *lexer.relex(start, start, "else "))
+        self.assertEqual(str(new_ast), str(Parser(Lexer(lexer.source).get_tokens()).parse()))
+
+        # After a syntax error, the next reparse starts over
+        start = lexer.source.index("level += 1")
+        with self.assertRaises(SyntaxError):
+            parser.reparse(new_ast, *lexer.relex(start, start, "let "))
+        new_ast = parser.reparse(new_ast, *lexer.relex(start, start + 4, ""))
+        self.assertEqual(str(new_ast), str(Parser(Lexer(lexer.source).get_tokens()).parse()))
+
 
 def make_block_statement(statements: List[Statement]) -> BlockStatement:
     return BlockStatement(statements)
@@ -0,0 +1,69 @@
+import unittest
+
+from src.evaluator import evaluate
+from src.python_backend import FunctionCache, compile_function, compile_to_python, program_hash, python_source
+from tests.helpers import MAIN_INPUTS, MAIN_SOURCE, PROGRAM, parse
+
+
+class PythonBackendTestCase(unittest.TestCase):
+    maxDiff = None
+
+    def test_compile_to_python(self):
+        ast = parse(PROGRAM)
+
+        self.assertEqual(compile_to_python(ast)({}), evaluate(ast))
+
+    def test_main_source(self):
+        ast = parse(MAIN_SOURCE)
+        function = compile_to_python(ast)
+
+        for inputs in MAIN_INPUTS:
+            with self.subTest(inputs=inputs):
+                self.assertEqual(function(inputs), evaluate(ast, inputs))
+
+    def test_python_keywords(self):
+        function = compile_to_python(parse("let class = 1, def = class\nlambda = def + 1\n"))
+
+        self.assertEqual(function({}), {"class": 1, "def": 1, "lambda": 2})
+
+    def test_python_source(self):
+        self.assertEqual(python_source(parse("a = b and c or 1\nif a then x = (y = 2) + 1 else x += 2\n")), (
+            "def program(inputs):\n"
+            "    v_a = inputs.get('a')\n"
+            "    v_b = inputs.get('b')\n"
+            "    v_c = inputs.get('c')\n"
+            "    v_x = inputs.get('x')\n"
+            "    v_y = inputs.get('y')\n"
+            "    v_a = v_b and v_c or 1\n"
+            "    if v_a:\n"
+            "        v_x = (v_y := 2) + 1\n"
+            "    else:\n"
+            "        v_x = v_x + 2\n"
+            "    return {'a': v_a, 'b': v_b, 'c': v_c, 'x': v_x, 'y': v_y}"
+        ))
+
+    def test_inputs(self):
+        function = compile_to_python(parse(
+            "if level > 16 then evolved = true else evolved = false\n"
+            "level += 1\n"
+        ))
+
+        self.assertEqual(function({"level": 20, "unused": 1}), {"level": 21, "evolved": True})
+        self.assertEqual(function({"level": 3}), {"level": 4, "evolved": False})
+        with self.assertRaises(TypeError):
+            function({})
+
+    def test_cache(self):
+        source = "if level > 16 then evolved = true\n"
+        cache = FunctionCache(max_size=2)
+
+        function = cache.get(parse(source))
+        self.assertIs(cache.get(parse(source)), function)
+        self.assertEqual(program_hash(parse(source)), program_hash(parse(source)))
+        self.assertNotEqual(program_hash(parse(source)), program_hash(parse("if level > 15 then evolved = true\n")))
+
+        cache.get(parse("a = 1\n"))
+        cache.get(parse("a = 2\n"))
+        self.assertEqual(len(cache.functions), 2)
+        self.assertIsNot(cache.get(parse(source)), function)
+        self.assertIsNot(compile_function(parse(source)), compile_function(parse(source)))
@@ -0,0 +1,89 @@
+import unittest
+
+from src.bytecode import compile_program, run
+from tests.helpers import MAIN_INPUTS, MAIN_SOURCE, parse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+else:
+    from src.vectorized import evaluate_columns
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class VectorizedTestCase(unittest.TestCase):
+    maxDiff = None
+
+    input = MAIN_SOURCE + (
+        "let half = level / 2, rest = level % 3, bonus\n"
+        "if evo_cond != nil and evo_cond > \"g\" then bonus = level * 2 else bonus = 0.5\n"
+        "label = evo_cond or \"none\"\n"
+        "evolved = pokemon == \"ivysaur\" or nil\n"
+        "level += 1\n"
+    )
+
+    columns = {
+        "level": [20, 3, 16, 17, 42, 0],
+        "evo_cond": ["solar_stone", None, "friendship_at_night", "friendship_with_exchange", "moon_stone", None],
+        "eevee": ["eevee", "eevee", None, "eevee", "eevee", "eevee"],
+    }
+
+    def expected(self, source: str, columns: dict) -> dict:
+        code = compile_program(parse(source))
+        records = [run(code, dict(zip(columns, values))) for values in zip(*columns.values())]
+        return {name: [record[name] for record in records] for name in records[0]}
+
+    def test_evaluate_columns(self):
+        columns = {name: np.array(values) for name, values in self.columns.items()}
+
+        result = evaluate_columns(parse(self.input), columns)
+
+        self.assertEqual({name: column.tolist() for name, column in result.items()}, self.expected(self.input, self.columns))
+        self.assertEqual(result["level"].dtype, np.int64)
+        self.assertEqual(result["half"].dtype, np.float64)
+        self.assertEqual(columns["level"].tolist(), self.columns["level"])
+
+    def test_main_source(self):
+        columns = {name: [inputs[name] for inputs in MAIN_INPUTS] for name in MAIN_INPUTS[0]}
+
+        result = evaluate_columns(parse(MAIN_SOURCE), {name: np.array(values) for name, values in columns.items()})
+
+        self.assertEqual({name: column.tolist() for name, column in result.items()}, self.expected(MAIN_SOURCE, columns))
+
+    def test_uniform_conditions(self):
+        source = "let a = 1 + 2 * 3, b = nil\nif a > 5 then b = \"big\" else b = 1 / 0\nc = b and (d = 1)\n"
+
+        result = evaluate_columns(parse(source), {}, size=3)
+
+        self.assertEqual({name: column.tolist() for name, column in result.items()}, {
+            "a": [7] * 3,
+            "b": ["big"] * 3,
+            "c": [1] * 3,
+            "d": [1] * 3,
+        })
+
+    def test_nil_conditions(self):
+        source = (
+            "l = nil or \"default\"\n"
+            "if nil then a = 1 else a = 2\n"
+            "if (b = nil) then c = 1 else c = 2\n"
+            "let d = nil and 1, e = (nil == nil) and nil\n"
+            "if x then f = x else f = \"none\"\n"
+            "g = x or nil\n"
+        )
+        columns = {"x": [None, "eevee", None]}
+
+        result = evaluate_columns(parse(source), {"x": np.array(columns["x"], dtype=object)})
+
+        self.assertEqual({name: column.tolist() for name, column in result.items()}, self.expected(source, columns))
+
+    def test_errors(self):
+        with self.assertRaises(TypeError):
+            evaluate_columns(parse("a = level > 16\n"), {"level": np.array([20, None])})
+        with self.assertRaises(FloatingPointError):
+            evaluate_columns(parse("a = level / 0\n"), {"level": np.array([20, 1])})
+        with self.assertRaises(ValueError):
+            evaluate_columns(parse("a = level + b\n"), {"level": np.array([20, 1]), "b": np.array([1])})
+        with self.assertRaises(ValueError):
+            evaluate_columns(parse("a = 1\n"), {})